@@ -1,63 +1,122 @@
 import logging
 import time
 import zipfile
-from io import BytesIO
 
-from django.conf import settings
 from django.contrib import admin, messages
-from django.db import transaction
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from django.utils.translation import gettext_lazy as _
-from sage_imap.helpers.enums import Flag, FlagCommand
-from sage_imap.models.message import MessageSet
-from sage_imap.services import IMAPClient, IMAPMailboxUIDService
 
-from sage_mailbox.models.mailbox import Mailbox, StandardMailboxNames
+from sage_mailbox.conf import imap_settings
+from sage_mailbox.repository.service import EmailActionService
+from sage_mailbox.utils import imap_credentials
 
 logger = logging.getLogger(__name__)
 
+ZIP_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _get_action_service():
+    return EmailActionService(*imap_credentials())
+
+
+def _enqueue_action(request, task_name, queryset, description):
+    """Queue an email action on Celery and tell the user it was scheduled."""
+    from sage_mailbox import tasks
+
+    ids = list(queryset.values_list("id", flat=True))
+    result = getattr(tasks, task_name).delay(ids, request.user.id)
+    logger.debug("Queued %s for %d emails as task %s.", task_name, len(ids), result.id)
+    messages.info(
+        request,
+        _("Queued {} emails to be {}. Task ID: {}.").format(
+            len(ids), description, result.id
+        ),
+    )
+
+
+def _start_timer():
+    """Return a callable giving the seconds elapsed since this call."""
+    start_time = time.monotonic()
+    return lambda: time.monotonic() - start_time
+
+
+class _ZipStreamBuffer:
+    """Write-only file object collecting zip output until it is drained.
+
+    It has no ``seek``, so ``zipfile`` writes entries sequentially with data
+    descriptors and the archive can be streamed while it is being built.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _stream_eml(raw):
+    """Yield a raw message in ``ZIP_STREAM_CHUNK_SIZE`` slices without copying it."""
+    raw = memoryview(raw)
+    for start in range(0, len(raw), ZIP_STREAM_CHUNK_SIZE):
+        yield raw[start : start + ZIP_STREAM_CHUNK_SIZE]
+
+
+def _stream_eml_zip(email_messages):
+    """Yield a deflated zip archive of the given emails as it is being built.
+
+    Each raw message is compressed straight into its zip entry in
+    ``ZIP_STREAM_CHUNK_SIZE`` slices of a ``memoryview``, so neither the payload
+    nor its compressed form is copied whole before being sent.
+    """
+    buffer = _ZipStreamBuffer()
+    with zipfile.ZipFile(
+        buffer, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1
+    ) as zip_file:
+        for email_message in email_messages:
+            file_name = f"{email_message.uid}.eml"
+            with zip_file.open(file_name, "w") as entry:
+                for chunk in _stream_eml(email_message.raw):
+                    entry.write(chunk)
+                    if data := buffer.drain():
+                        yield data
+            logger.debug("Added %s to zip file.", file_name)
+    yield buffer.drain()
+
 
 @admin.action(description=_("Move selected emails to trash"))
-@transaction.atomic
 def move_to_trash(modeladmin, request, queryset):
-    start_time = time.time()
-    emails_to_delete = []
+    if imap_settings.IMAP_ASYNC_ACTIONS_ENABLED:
+        _enqueue_action(request, "move_to_trash_task", queryset, _("moved to trash"))
+        return
 
-    host = settings.IMAP_SERVER_DOMAIN
-    username = settings.IMAP_SERVER_USER
-    password = settings.IMAP_SERVER_PASSWORD
+    elapsed = _start_timer()
 
     try:
-        with IMAPClient(host, username, password) as imap_client:
-            imap_mailbox_service = IMAPMailboxUIDService(imap_client)
-            trash_mailbox = Mailbox.objects.get(folder_type=StandardMailboxNames.TRASH)
-
-            for email in queryset:
-                imap_mailbox_service.select(email.mailbox.name)
-                imap_mailbox_service.uid_trash(
-                    MessageSet(str(email.uid)), trash_mailbox.name
-                )
-                emails_to_delete.append(email)
-                logger.debug("Moved email with UID %s to trash.", email.uid)
-
-            queryset.model.objects.filter(
-                id__in=[email.id for email in emails_to_delete]
-            ).delete()
-            logger.debug("Deleted moved email messages from the database.")
-
-        end_time = time.time()
-        runtime = end_time - start_time
+        updated = _get_action_service().move_to_trash(queryset)
+
         messages.success(
             request,
             _(
                 "Successfully moved {} emails to trash and deleted them "
                 "from the database in {:.2f} seconds."
-            ).format(len(emails_to_delete), runtime),
+            ).format(updated, elapsed()),
         )
 
     except Exception as exc:
-        end_time = time.time()
-        runtime = end_time - start_time
         logger.error(
             "Error moving email messages to trash: %s", str(exc), exc_info=True
         )
@@ -66,56 +125,29 @@ def move_to_trash(modeladmin, request, queryset):
             _(
                 "Failed to move some emails to trash. Please try again. "
                 "Task completed in {:.2f} seconds."
-            ).format(runtime),
+            ).format(elapsed()),
         )
-        transaction.set_rollback(True)
 
 
 @admin.action(description=_("Mark selected emails as read"))
-@transaction.atomic
 def mark_as_read(modeladmin, request, queryset):
-    start_time = time.time()
-    email_messages_to_update = []
+    if imap_settings.IMAP_ASYNC_ACTIONS_ENABLED:
+        _enqueue_action(request, "mark_as_read_task", queryset, _("marked as read"))
+        return
 
-    host = settings.IMAP_SERVER_DOMAIN
-    username = settings.IMAP_SERVER_USER
-    password = settings.IMAP_SERVER_PASSWORD
+    elapsed = _start_timer()
 
     try:
-        with IMAPClient(host, username, password) as client:
-            mailbox = IMAPMailboxUIDService(client)
-
-            for email_message in queryset:
-                mailbox.select(email_message.mailbox.name)
-                if not email_message.is_read:
-                    status, data = client.uid(
-                        "STORE", str(email_message.uid), "+FLAGS", "\\Seen"
-                    )
-                    logger.debug("Marked email with UID %s as SEEN.", email_message.uid)
-
-                    email_message.is_read = True
-                    email_messages_to_update.append(email_message)
-                    logger.debug(
-                        "Prepared to mark email message "
-                        "object %s as read in the database.",
-                        email_message.pk,
-                    )
-
-        queryset.model.objects.bulk_update(email_messages_to_update, ["is_read"])
-        logger.debug("Bulk updated all email messages to read status in the database.")
-
-        end_time = time.time()
-        runtime = end_time - start_time
+        updated = _get_action_service().mark_as_read(queryset)
+
         messages.success(
             request,
             _("Successfully marked {} emails as read in {:.2f} seconds.").format(
-                len(email_messages_to_update), runtime
+                updated, elapsed()
             ),
         )
 
     except Exception as exc:
-        end_time = time.time()
-        runtime = end_time - start_time
         logger.error(
             "Error marking email messages as read: %s", str(exc), exc_info=True
         )
@@ -124,61 +156,29 @@ def mark_as_read(modeladmin, request, queryset):
             _(
                 "Failed to mark some emails as read. Please try again. "
                 "Task completed in {:.2f} seconds."
-            ).format(runtime),
+            ).format(elapsed()),
         )
-        transaction.set_rollback(True)
 
 
 @admin.action(description=_("Mark selected emails as unread"))
-@transaction.atomic
 def mark_as_unread(modeladmin, request, queryset):
-    start_time = time.time()
-    email_messages_to_update = []
+    if imap_settings.IMAP_ASYNC_ACTIONS_ENABLED:
+        _enqueue_action(request, "mark_as_unread_task", queryset, _("marked as unread"))
+        return
 
-    host = settings.IMAP_SERVER_DOMAIN
-    username = settings.IMAP_SERVER_USER
-    password = settings.IMAP_SERVER_PASSWORD
+    elapsed = _start_timer()
 
     try:
-        with IMAPClient(host, username, password) as client:
-            mailbox = IMAPMailboxUIDService(client)
-
-            for email_message in queryset:
-                mailbox.select(email_message.mailbox.name)
-                if email_message.is_read:
-                    # TODO: python-sage-imap does not support uid on flag service
-                    status, data = client.uid(
-                        "STORE", str(email_message.uid), FlagCommand.REMOVE, Flag.SEEN
-                    )
-                    logger.debug(
-                        "Unmarked email with Message-ID %s as SEEN.", email_message.uid
-                    )
-
-                    email_message.is_read = False
-                    email_messages_to_update.append(email_message)
-                    logger.debug(
-                        "Prepared to mark email message "
-                        "object %s as unread in the database.",
-                        email_message.pk,
-                    )
-
-        queryset.model.objects.bulk_update(email_messages_to_update, ["is_read"])
-        logger.debug(
-            "Bulk updated all email messages to unread status in the database."
-        )
+        updated = _get_action_service().mark_as_unread(queryset)
 
-        end_time = time.time()
-        runtime = end_time - start_time
         messages.success(
             request,
             _("Successfully marked {} emails as unread in {:.2f} seconds.").format(
-                len(email_messages_to_update), runtime
+                updated, elapsed()
             ),
         )
 
     except Exception as exc:
-        end_time = time.time()
-        runtime = end_time - start_time
         logger.error(
             "Error marking email messages as unread: %s", str(exc), exc_info=True
         )
@@ -187,60 +187,31 @@ def mark_as_unread(modeladmin, request, queryset):
             _(
                 "Failed to mark some emails as unread. Please try again. "
                 "Task completed in {:.2f} seconds."
-            ).format(runtime),
+            ).format(elapsed()),
         )
-        transaction.set_rollback(True)
 
 
 @admin.action(description=_("Mark selected emails as flagged"))
-@transaction.atomic
 def mark_as_flagged(modeladmin, request, queryset):
-    start_time = time.time()
-    email_messages_to_update = []
+    if imap_settings.IMAP_ASYNC_ACTIONS_ENABLED:
+        _enqueue_action(
+            request, "mark_as_flagged_task", queryset, _("marked as flagged")
+        )
+        return
 
-    host = settings.IMAP_SERVER_DOMAIN
-    username = settings.IMAP_SERVER_USER
-    password = settings.IMAP_SERVER_PASSWORD
+    elapsed = _start_timer()
 
     try:
-        with IMAPClient(host, username, password) as client:
-            mailbox = IMAPMailboxUIDService(client)
-
-            for email_message in queryset:
-                mailbox.select(email_message.mailbox.name)
-                if not email_message.is_flagged:
-                    status, data = client.uid(
-                        "STORE", str(email_message.uid), "+FLAGS", "\\Flagged"
-                    )
-                    logger.debug(
-                        "Marked email with UID %s as FLAGGED.", email_message.uid
-                    )
-
-                    email_message.is_flagged = True
-                    email_messages_to_update.append(email_message)
-                    logger.debug(
-                        "Prepared to mark email message "
-                        "object %s as flagged in the database.",
-                        email_message.pk,
-                    )
-
-        queryset.model.objects.bulk_update(email_messages_to_update, ["is_flagged"])
-        logger.debug(
-            "Bulk updated all email messages to flagged status in the database."
-        )
+        updated = _get_action_service().mark_as_flagged(queryset)
 
-        end_time = time.time()
-        runtime = end_time - start_time
         messages.success(
             request,
             _("Successfully marked {} emails as flagged in {:.2f} seconds.").format(
-                len(email_messages_to_update), runtime
+                updated, elapsed()
             ),
         )
 
     except Exception as exc:
-        end_time = time.time()
-        runtime = end_time - start_time
         logger.error(
             "Error marking email messages as flagged: %s", str(exc), exc_info=True
         )
@@ -249,60 +220,31 @@ def mark_as_flagged(modeladmin, request, queryset):
             _(
                 "Failed to mark some emails as flagged. Please try again. "
                 "Task completed in {:.2f} seconds."
-            ).format(runtime),
+            ).format(elapsed()),
         )
-        transaction.set_rollback(True)
 
 
 @admin.action(description=_("Mark selected emails as unflagged"))
-@transaction.atomic
 def mark_as_unflagged(modeladmin, request, queryset):
-    start_time = time.time()
-    email_messages_to_update = []
+    if imap_settings.IMAP_ASYNC_ACTIONS_ENABLED:
+        _enqueue_action(
+            request, "mark_as_unflagged_task", queryset, _("marked as unflagged")
+        )
+        return
 
-    host = settings.IMAP_SERVER_DOMAIN
-    username = settings.IMAP_SERVER_USER
-    password = settings.IMAP_SERVER_PASSWORD
+    elapsed = _start_timer()
 
     try:
-        with IMAPClient(host, username, password) as client:
-            mailbox = IMAPMailboxUIDService(client)
-
-            for email_message in queryset:
-                mailbox.select(email_message.mailbox.name)
-                if email_message.is_flagged:
-                    status, data = client.uid(
-                        "STORE", str(email_message.uid), "-FLAGS", "\\Flagged"
-                    )
-                    logger.debug(
-                        "Unmarked email with UID %s as FLAGGED.", email_message.uid
-                    )
-
-                    email_message.is_flagged = False
-                    email_messages_to_update.append(email_message)
-                    logger.debug(
-                        "Prepared to mark email message "
-                        "object %s as unflagged in the database.",
-                        email_message.pk,
-                    )
-
-        queryset.model.objects.bulk_update(email_messages_to_update, ["is_flagged"])
-        logger.debug(
-            "Bulk updated all email messages to unflagged status in the database."
-        )
+        updated = _get_action_service().mark_as_unflagged(queryset)
 
-        end_time = time.time()
-        runtime = end_time - start_time
         messages.success(
             request,
             _("Successfully marked {} emails as unflagged in {:.2f} seconds.").format(
-                len(email_messages_to_update), runtime
+                updated, elapsed()
             ),
         )
 
     except Exception as exc:
-        end_time = time.time()
-        runtime = end_time - start_time
         logger.error(
             "Error marking email messages as unflagged: %s", str(exc), exc_info=True
         )
@@ -311,50 +253,46 @@ def mark_as_unflagged(modeladmin, request, queryset):
             _(
                 "Failed to mark some emails as unflagged. Please try again. "
                 "Task completed in {:.2f} seconds."
-            ).format(runtime),
+            ).format(elapsed()),
         )
-        transaction.set_rollback(True)
 
 
 @admin.action(description=_("Download selected emails as EML"))
 def download_as_eml(modeladmin, request, queryset):
-    start_time = time.time()
-    email_files = []
+    elapsed = _start_timer()
 
     try:
-        for email_message in queryset:
-            if email_message.raw:
-                email_files.append((f"{email_message.uid}.eml", email_message.raw))
-                logger.debug(
-                    "Added raw data for email with Message-ID %s.", email_message.uid
-                )
-
-        if len(email_files) == 1:
-            response = HttpResponse(email_files[0][1], content_type="message/rfc822")
-            response[
-                "Content-Disposition"
-            ] = f'attachment; filename="{email_files[0][0]}"'
-            logger.debug("Prepared single EML file for download: %s", email_files[0][0])
+        email_messages = (
+            queryset.filter(raw__isnull=False).exclude(raw=b"").only("uid", "raw")
+        )
+        email_count = email_messages.count()
+
+        if email_count == 1:
+            email_message = email_messages.get()
+            file_name = f"{email_message.uid}.eml"
+            # Streamed in slices so the message is not copied into one more
+            # full-size bytes object for the response body.
+            response = StreamingHttpResponse(
+                _stream_eml(email_message.raw), content_type="message/rfc822"
+            )
+            response["Content-Length"] = len(email_message.raw)
+            response["Content-Disposition"] = f'attachment; filename="{file_name}"'
+            logger.debug("Prepared single EML file for download: %s", file_name)
         else:
-            zip_buffer = BytesIO()
-            with zipfile.ZipFile(zip_buffer, "w") as zip_file:
-                for file_name, eml_data in email_files:
-                    zip_file.writestr(file_name, eml_data)
-                    logger.debug("Added %s to zip file.", file_name)
-
-            zip_buffer.seek(0)
-            response = HttpResponse(zip_buffer, content_type="application/zip")
+            response = StreamingHttpResponse(
+                _stream_eml_zip(email_messages.iterator(chunk_size=50)),
+                content_type="application/zip",
+            )
             response["Content-Disposition"] = 'attachment; filename="emails.zip"'
             logger.debug(
-                "Prepared zip file for download containing multiple EML files."
+                "Prepared zip stream for download containing %d EML files.",
+                email_count,
             )
 
-        end_time = time.time()
-        runtime = end_time - start_time
         messages.success(
             request,
             _("Successfully prepared download for {} emails in {:.2f} seconds.").format(
-                len(email_files), runtime
+                email_count, elapsed()
             ),
         )
         return response
@@ -366,47 +304,27 @@ def download_as_eml(modeladmin, request, queryset):
 
 
 @admin.action(description=_("Restore selected emails from trash to inbox"))
-@transaction.atomic
 def restore_from_trash(modeladmin, request, queryset):
-    start_time = time.time()
-    emails_to_restore = []
+    if imap_settings.IMAP_ASYNC_ACTIONS_ENABLED:
+        _enqueue_action(
+            request, "restore_from_trash_task", queryset, _("restored to inbox")
+        )
+        return
 
-    host = settings.IMAP_SERVER_DOMAIN
-    username = settings.IMAP_SERVER_USER
-    password = settings.IMAP_SERVER_PASSWORD
+    elapsed = _start_timer()
 
     try:
-        with IMAPClient(host, username, password) as imap_client:
-            imap_mailbox_service = IMAPMailboxUIDService(imap_client)
-            trash_mailbox = Mailbox.objects.get(folder_type=StandardMailboxNames.TRASH)
-            inbox_mailbox = Mailbox.objects.get(folder_type=StandardMailboxNames.INBOX)
-
-            for email in queryset:
-                imap_mailbox_service.select(trash_mailbox.name)
-                imap_mailbox_service.uid_restore(
-                    MessageSet(str(email.uid)), trash_mailbox.name, inbox_mailbox.name
-                )
-                emails_to_restore.append(email)
-                logger.debug("Restored email with UID %s to inbox.", email.uid)
-
-            queryset.model.objects.filter(
-                id__in=[email.id for email in emails_to_restore]
-            ).delete()
-            logger.debug("Deleted restored email messages from the database.")
-
-        end_time = time.time()
-        runtime = end_time - start_time
+        updated = _get_action_service().restore_from_trash(queryset)
+
         messages.success(
             request,
             _(
                 "Successfully restored {} emails to inbox and deleted "
                 "them from trash in {:.2f} seconds."
-            ).format(len(emails_to_restore), runtime),
+            ).format(updated, elapsed()),
         )
 
     except Exception as exc:
-        end_time = time.time()
-        runtime = end_time - start_time
         logger.error(
             "Error restoring email messages from trash: %s", str(exc), exc_info=True
         )
@@ -415,6 +333,5 @@ def restore_from_trash(modeladmin, request, queryset):
             _(
                 "Failed to restore and delete some emails from trash. "
                 "Please try again. Task completed in {:.2f} seconds."
-            ).format(runtime),
+            ).format(elapsed()),
         )
-        transaction.set_rollback(True)
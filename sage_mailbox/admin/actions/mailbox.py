@@ -2,7 +2,9 @@ import logging
 
 from django.contrib.admin import helpers
 from django.contrib.admin.decorators import action
+from django.contrib.admin.models import DELETION, LogEntry
 from django.contrib.admin.utils import model_ngettext
+from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import PermissionDenied
 from django.template.response import TemplateResponse
 from django.utils.translation import gettext_lazy as _
@@ -10,6 +12,29 @@ from django.utils.translation import gettext_lazy as _
 logger = logging.getLogger(__name__)
 
 
+def _log_deletions(request, objects):
+    """Record admin deletion log entries for all objects with one INSERT."""
+    objects = list(objects)
+    if not objects:
+        return
+    content_type_id = ContentType.objects.get_for_model(
+        objects[0], for_concrete_model=False
+    ).pk
+    LogEntry.objects.bulk_create(
+        [
+            LogEntry(
+                user_id=request.user.pk,
+                content_type_id=content_type_id,
+                object_id=str(obj.pk),
+                object_repr=str(obj)[:200],
+                action_flag=DELETION,
+                change_message="",
+            )
+            for obj in objects
+        ]
+    )
+
+
 @action(
     permissions=["delete"],
     description=_("Delete selected %(verbose_name_plural)s"),
@@ -43,9 +68,7 @@ def delete_selected(modeladmin, request, queryset):
             raise PermissionDenied
         n = len(queryset)
         if n:
-            for obj in queryset:
-                obj_display = str(obj)
-                modeladmin.log_deletion(request, obj, obj_display)
+            _log_deletions(request, queryset)
             modeladmin.delete_queryset(request, queryset)
         # Return None to display the change list page again.
         return None
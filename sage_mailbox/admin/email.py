@@ -3,28 +3,28 @@ import logging
 import mimetypes
 import time
 from collections import OrderedDict
-from datetime import datetime, timedelta
+from datetime import timedelta
 from email.utils import make_msgid
+from functools import lru_cache
 from typing import Any
 
-from django.conf import settings
 from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
 from django.contrib.sites.models import Site
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.mail import EmailMultiAlternatives
-from django.db import transaction
+from django.db import connections
+from django.db.models import BooleanField, Case, When
 from django.http import HttpRequest, HttpResponseRedirect
 from django.shortcuts import redirect
 from django.urls import path, reverse
 from django.urls.resolvers import URLPattern
-from django.utils.html import format_html
+from django.utils.functional import cached_property
 from django.utils.safestring import mark_safe
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
-from sage_imap.helpers.enums import Flag, FlagCommand
-from sage_imap.helpers.search import IMAPSearchCriteria
-from sage_imap.models.message import MessageSet
-from sage_imap.services import IMAPClient, IMAPMailboxService, IMAPMailboxUIDService
+from sage_imap.services import IMAPMailboxService, IMAPMailboxUIDService
 
 from sage_mailbox.admin.actions import (
     download_as_eml,
@@ -35,15 +35,47 @@ from sage_mailbox.admin.actions import (
     move_to_trash,
     restore_from_trash,
 )
+from sage_mailbox.admin.filters import DateRangeFilter
+from sage_mailbox.admin.paginator import LargeTablePaginator
+from sage_mailbox.conf import imap_settings
+from sage_mailbox.imap_pool import imap_pool
 from sage_mailbox.models import Attachment, EmailMessage, Junk, Sent, Trash
 from sage_mailbox.models.mailbox import Mailbox, StandardMailboxNames
-from sage_mailbox.repository.service import EmailSyncService
+from sage_mailbox.repository.service import (
+    EmailActionService,
+    EmailSyncService,
+    SeenFlagBatcher,
+)
+from sage_mailbox.utils import imap_credentials
 
 logger = logging.getLogger(__name__)
 
-imap_host = getattr(settings, "IMAP_SERVER_DOMAIN", None)
-imap_username = getattr(settings, "IMAP_SERVER_USER", None)
-imap_password = getattr(settings, "IMAP_SERVER_PASSWORD", None)
+
+@lru_cache(maxsize=1)
+def _get_seen_flag_batcher():
+    return SeenFlagBatcher(
+        *imap_credentials(),
+        delay=imap_settings.IMAP_SEEN_FLAG_DEBOUNCE,
+    )
+
+
+class EmailChangeList(ChangeList):
+    """Changelist that leaves the large body columns out of list queries."""
+
+    deferred_fields = ("raw", "plain_body", "html_body", "headers")
+
+    def get_queryset(self, request, *args, **kwargs):
+        queryset = super().get_queryset(request, *args, **kwargs)
+        if "is_recent" in self.list_display:
+            # One cutoff per request, compared in SQL instead of once per row.
+            queryset = queryset.annotate(
+                _is_recent=Case(
+                    When(created_at__gte=now() - timedelta(days=7), then=True),
+                    default=False,
+                    output_field=BooleanField(),
+                )
+            )
+        return queryset.defer(*self.deferred_fields)
 
 
 class AttachmentInline(admin.TabularInline):
@@ -61,35 +93,70 @@ class AttachmentInline(admin.TabularInline):
         "content_transfer_encoding",
     )
 
+    def get_queryset(self, request):
+        # The inline shows only metadata; never load the binary payloads.
+        return (
+            super()
+            .get_queryset(request)
+            .only(
+                "id",
+                "email_message",
+                "filename",
+                "file",
+                "content_type",
+                "content_transfer_encoding",
+            )
+        )
+
 
 @admin.register(EmailMessage)
 class EmailMessageAdmin(admin.ModelAdmin):
     mailbox_type = StandardMailboxNames.INBOX
+    # Folder type the changelist is limited to; the inbox admin lists every email.
+    folder_filter = None
 
     change_list_template = "admin/email/change_list.html"
     list_display = (
         "id",
         "uid",
-        "get_message_id",
+        "message_id",
         "subject",
-        "get_from_address",
+        "from_address",
         "has_attachment",
-        "total_attachments",
+        "attachment_count",
         "is_read",
         "is_flagged",
         "mailbox",
         "date",
         "modified_at",
     )
-    search_fields = (
+    # Recipient lists are long free text; searching them doubles the scanned
+    # bytes per row for little benefit.
+    search_fields = ("subject", "from_address", "message_id")
+    list_select_related = ("mailbox",)
+    # Only columns backed by an index (``has_attachment`` sorts by the indexed
+    # ``attachment_count``); sorting anything else scans the table.
+    sortable_by = (
+        "id",
         "subject",
         "from_address",
-        "to_address",
-        "cc_address",
-        "bcc_address",
-        "message_id",
+        "has_attachment",
+        "attachment_count",
+        "is_read",
+        "is_flagged",
+        "date",
     )
-    list_select_related = ("mailbox",)
+    list_per_page = 25
+    # Permissions required for each action, checked in get_actions
+    permission_action_map = (
+        ("sage_mailbox.mark_read", "mark_as_read"),
+        ("sage_mailbox.mark_unread", "mark_as_unread"),
+        ("sage_mailbox.flag_email", "mark_as_flagged"),
+        ("sage_mailbox.unflag_email", "mark_as_unflagged"),
+        ("sage_mailbox.download_eml", "download_as_eml"),
+    )
+    show_full_result_count = False
+    paginator = LargeTablePaginator
     save_on_top = True
     search_help_text = mark_safe(
         _(
@@ -97,9 +164,6 @@ class EmailMessageAdmin(admin.ModelAdmin):
             "<ul>"
             "<li><strong>Subject</strong>: The subject line of the email.</li>"
             "<li><strong>From Address</strong>: The email address of the sender.</li>"
-            "<li><strong>To Address</strong>: The email addresses of the primary recipients.</li>"
-            "<li><strong>CC Address</strong>: The email addresses of the carbon copy recipients.</li>"
-            "<li><strong>BCC Address</strong>: The email addresses of the blind carbon copy recipients.</li>"
             "<li><strong>Message ID</strong>: The unique identifier of the email message.</li>"
             "</ul>"
         )
@@ -112,7 +176,13 @@ class EmailMessageAdmin(admin.ModelAdmin):
         download_as_eml,
         move_to_trash,
     )
-    list_filter = ("date", "mailbox", "is_read", "is_flagged", "modified_at")
+    list_filter = (
+        ("date", DateRangeFilter),
+        "mailbox",
+        "is_read",
+        "is_flagged",
+        ("modified_at", DateRangeFilter),
+    )
     readonly_fields = (
         "uid",
         "date",
@@ -179,31 +249,13 @@ class EmailMessageAdmin(admin.ModelAdmin):
         empty_value=_("Not Recent"),
     )
     def is_recent(self, obj):
-        return obj.created_at >= datetime.now() - timedelta(days=7)
+        return obj._is_recent
 
     @admin.display(
-        boolean=True, ordering="has_attachments", description=_("Has Attachment")
+        boolean=True, ordering="attachment_count", description=_("Has Attachment")
     )
     def has_attachment(self, obj):
-        return obj.has_attachments
-
-    @admin.display(ordering="total_attachments", description=_("Total Attachments"))
-    def total_attachments(self, obj):
-        return obj.total_attachments
-
-    @admin.display(ordering="from_address", description=_("From Address"))
-    def get_from_address(self, obj):
-        return format_html(
-            '<div style="max-width: 130px; white-space: nowrap; overflow: hidden; text-overflow: ellipsis;">{}</div>',
-            obj.from_address,
-        )
-
-    @admin.display(ordering="message_id", description=_("Message-ID"))
-    def get_message_id(self, obj):
-        return format_html(
-            '<div style="max-width: 130px; white-space: nowrap; overflow: hidden; text-overflow: ellipsis;">{}</div>',
-            obj.message_id,
-        )
+        return obj.attachment_count > 0
 
     def get_actions(self, request: HttpRequest) -> OrderedDict[Any, Any]:
         actions = super().get_actions(request)
@@ -212,18 +264,11 @@ class EmailMessageAdmin(admin.ModelAdmin):
         if request.user.is_superuser:
             return actions
 
-        # Define a dictionary mapping permissions to actions
-        permission_action_map = {
-            "mark_read": "mark_as_read",
-            "mark_unread": "mark_as_unread",
-            "flag_email": "mark_as_flagged",
-            "unflag_email": "mark_as_unflagged",
-            "download_eml": "download_as_eml",
-        }
-
-        # Remove actions the user does not have permission for
-        for perm, action in permission_action_map.items():
-            if not request.user.has_perm(f"sage_mailbox.{perm}"):
+        # Remove actions the user does not have permission for, checking them
+        # against one cached permission set instead of a backend call each
+        user_permissions = request.user.get_all_permissions()
+        for perm, action in self.permission_action_map:
+            if perm not in user_permissions:
                 actions.pop(action, None)
 
         return actions
@@ -255,28 +300,72 @@ class EmailMessageAdmin(admin.ModelAdmin):
         return super().get_readonly_fields(request, obj)
 
     def get_queryset(self, request: HttpRequest):
-        qs = super().get_queryset(request)
-        return qs.select_related_mailbox().total_attachments().has_attachments()
+        return super().get_queryset(request).for_admin(self.folder_filter)
+
+    def get_object(self, request, object_id, from_field=None):
+        # change_view loads the email to flag it as read and the change form
+        # loads it again; keep the first instance for the rest of the request.
+        cache = request.__dict__.setdefault("_sage_mailbox_objects", {})
+        key = (self.model, object_id, from_field)
+        if key not in cache:
+            cache[key] = super().get_object(request, object_id, from_field)
+        return cache[key]
+
+    def get_changelist(self, request, **kwargs):
+        return EmailChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        if not (
+            search_term
+            and imap_settings.IMAP_ADMIN_FULL_TEXT_SEARCH
+            and connections[queryset.db].vendor == "postgresql"
+        ):
+            return super().get_search_results(request, queryset, search_term)
+
+        # Matches the GIN expression index described in the installation docs,
+        # instead of one leading-wildcard ILIKE per search field.
+        from django.contrib.postgres.search import SearchQuery, SearchVector
+
+        queryset = queryset.annotate(
+            _search_vector=SearchVector(*self.search_fields, config="simple")
+        ).filter(
+            _search_vector=SearchQuery(
+                search_term, config="simple", search_type="websearch"
+            )
+        )
+        return queryset, False
+
+    @cached_property
+    def url_name_prefix(self):
+        """``<app_label>_<model_name>``, the prefix of this admin's URL names."""
+        return f"{self.model._meta.app_label}_{self.model._meta.model_name}"
+
+    @cached_property
+    def changelist_url(self):
+        """The changelist URL, resolved once per admin instance."""
+        return reverse(f"admin:{self.url_name_prefix}_changelist")
 
     def get_urls(self) -> list[URLPattern]:
         urls = super().get_urls()
-        custom_urls = [
+        opts = self.model._meta
+        # Folder proxies (Sent, Junk, Trash) sync under their own sub-path.
+        sync_path = f"sync-emails/{opts.model_name}/" if opts.proxy else "sync-emails/"
+        urls.insert(
+            0,
             path(
-                "sync-emails/",
+                sync_path,
                 self.admin_site.admin_view(self.sync_emails),
-                name=f"{self.model._meta.app_label}_{self.model._meta.model_name}_sync",
+                name=f"{self.url_name_prefix}_sync",
             ),
-        ]
-        return custom_urls + urls
+        )
+        return urls
 
     def sync_emails(self, request):
-        start_time = time.time()
-
-        mailbox_name = Mailbox.objects.get(folder_type=self.mailbox_type).folder_type
+        start_time = time.monotonic()
 
         try:
             # Try to get the mailbox
-            mailbox = Mailbox.objects.get(folder_type=mailbox_name)
+            mailbox = Mailbox.objects.only("name").get(folder_type=self.mailbox_type)
         except ObjectDoesNotExist:
             # If the mailbox does not exist, show a user-friendly message
             message = (
@@ -286,17 +375,36 @@ class EmailMessageAdmin(admin.ModelAdmin):
             messages.add_message(request, messages.WARNING, message)
 
             # Redirect to the admin change list URL
-            change_list_url = reverse(
-                f"admin:{self.model._meta.app_label}_"
-                f"{self.model._meta.model_name}_changelist"
-            )
+            change_list_url = self.changelist_url
+            return redirect(change_list_url)
+
+        if imap_settings.IMAP_ASYNC_ACTIONS_ENABLED:
+            from sage_mailbox.tasks import LAST_SYNC_CACHE_KEY, queue_sync_emails
+
+            result = queue_sync_emails(self.mailbox_type, request.user.id)
+            if result is None:
+                message = f"Email synchronization of {mailbox.name} is already queued."
+            else:
+                message = (
+                    f"Email synchronization of {mailbox.name} queued. "
+                    f"Task ID: {result.id}."
+                )
+            last_sync = cache.get(LAST_SYNC_CACHE_KEY.format(self.mailbox_type))
+            if last_sync:
+                message += (
+                    f" Last sync at {last_sync['finished_at']:%Y-%m-%d %H:%M:%S}: "
+                    f"{last_sync['created_emails']} emails and "
+                    f"{last_sync['created_attachments']} attachments created."
+                )
+            messages.add_message(request, messages.INFO, message)
+            change_list_url = self.changelist_url
             return redirect(change_list_url)
 
         # Proceed with email synchronization if the mailbox exists
-        service = EmailSyncService(imap_host, imap_username, imap_password)
+        service = EmailSyncService(*imap_credentials())
         result = service.fetch_and_save_emails(mailbox.name)
 
-        end_time = time.time()
+        end_time = time.monotonic()
         runtime = end_time - start_time
 
         created_emails = result.get("created_emails", 0)
@@ -312,35 +420,67 @@ class EmailMessageAdmin(admin.ModelAdmin):
         messages.add_message(request, messages.INFO, message)
 
         # Redirect to the change list URL
-        change_list_url = reverse(
-            f"admin:{self.model._meta.app_label}_"
-            f"{self.model._meta.model_name}_changelist"
-        )
+        change_list_url = self.changelist_url
         return redirect(change_list_url)
 
+    def changelist_view(self, request, extra_context=None):
+        if imap_settings.IMAP_ASYNC_ACTIONS_ENABLED:
+            from sage_mailbox.tasks import LAST_SYNC_CACHE_KEY
+
+            # Background syncs report back through the cache, not the request.
+            extra_context = {
+                "last_sync": cache.get(LAST_SYNC_CACHE_KEY.format(self.mailbox_type)),
+                **(extra_context or {}),
+            }
+        return super().changelist_view(request, extra_context)
+
     def change_view(self, request, object_id, form_url="", extra_context=None):
         email_message = self.get_object(request, object_id)
-        if email_message and not email_message.is_read:
+        if (
+            email_message
+            and not email_message.is_read
+            and imap_settings.IMAP_SEEN_FLAG_DEBOUNCE
+        ):
+            # Flag the email with the next batch and render the page right away.
+            _get_seen_flag_batcher().add(
+                email_message.mailbox.name, email_message.uid, email_message.pk
+            )
+            email_message.is_read = True
+            messages.success(request, _("Email marked as read."))
+        elif (
+            email_message
+            and not email_message.is_read
+            and imap_settings.IMAP_ASYNC_ACTIONS_ENABLED
+        ):
+            from sage_mailbox.tasks import mark_as_read_task
+
+            # The task stores \Seen and then updates the row; the page already
+            # renders the email as read.
+            mark_as_read_task.delay([email_message.pk], request.user.id)
+            email_message.is_read = True
+        elif email_message and not email_message.is_read:
             try:
-                with IMAPClient(imap_host, imap_username, imap_password) as client:
-                    with IMAPMailboxUIDService(client) as mailbox:
-                        mailbox.select(email_message.mailbox.name)
-
-                        status, data = client.uid(
-                            "STORE", str(email_message.uid), "+FLAGS", "\\Seen"
-                        )
-                        logger.debug(
-                            "Marked email with UID %s as SEEN on IMAP server.",
-                            email_message.uid,
-                        )
-
-                        email_message.is_read = True
-                        email_message.save(update_fields=["is_read"])
-                        logger.debug(
-                            "Marked email message object %s as read in the database.",
-                            email_message.pk,
-                        )
-                        messages.success(request, _("Email marked as read."))
+                with imap_pool.connection(*imap_credentials()) as client:
+                    IMAPMailboxUIDService(client).select(email_message.mailbox.name)
+
+                    status, data = client.uid(
+                        "STORE", str(email_message.uid), "+FLAGS", "\\Seen"
+                    )
+                    logger.debug(
+                        "Marked email with UID %s as SEEN on IMAP server.",
+                        email_message.uid,
+                    )
+
+                # A plain UPDATE skips save() and its signals on every open.
+                type(email_message)._base_manager.filter(pk=email_message.pk).update(
+                    is_read=True
+                )
+                email_message.is_read = True
+                logger.debug(
+                    "Marked email message object %s as read in the database.",
+                    email_message.pk,
+                )
+                messages.success(request, _("Email marked as read."))
             except Exception as e:
                 logger.error(
                     "Error marking email message %s as read: %s",
@@ -357,30 +497,10 @@ class EmailMessageAdmin(admin.ModelAdmin):
 @admin.register(Sent)
 class SentAdmin(EmailMessageAdmin):
     mailbox_type = StandardMailboxNames.SENT
+    folder_filter = StandardMailboxNames.SENT
 
     actions = (download_as_eml,)
 
-    def get_queryset(self, request: HttpRequest):
-        qs = super().get_queryset(request)
-        return (
-            qs.select_related_mailbox()
-            .total_attachments()
-            .has_attachments()
-            .filter(mailbox__folder_type=StandardMailboxNames.SENT)
-        )
-
-    def get_urls(self) -> list[URLPattern]:
-        urls = super().get_urls()
-        custom_urls = [
-            path(
-                "sync-emails/sent/",
-                self.admin_site.admin_view(self.sync_emails),
-                name=f"{self.model._meta.app_label}_{self.model._meta.model_name}_sync",
-            ),
-        ]
-        total = custom_urls + urls
-        return total
-
     # TODO: implement send mail functionality only on save not update
     # def save_model(self, request, obj, form, change):
     #     """
@@ -475,6 +595,7 @@ class SentAdmin(EmailMessageAdmin):
 @admin.register(Junk)
 class JunkAdmin(EmailMessageAdmin):
     mailbox_type = StandardMailboxNames.SPAM
+    folder_filter = StandardMailboxNames.SPAM
 
     actions = (download_as_eml,)
 
@@ -484,43 +605,14 @@ class JunkAdmin(EmailMessageAdmin):
     def has_change_permission(self, request: HttpRequest, obj=None) -> bool:
         return False
 
-    def get_queryset(self, request: HttpRequest):
-        qs = super().get_queryset(request)
-        return (
-            qs.select_related_mailbox()
-            .total_attachments()
-            .has_attachments()
-            .filter(mailbox__folder_type=StandardMailboxNames.SPAM)
-        )
-
-    def get_urls(self) -> list[URLPattern]:
-        urls = super().get_urls()
-        custom_urls = [
-            path(
-                "sync-emails/junk/",
-                self.admin_site.admin_view(self.sync_emails),
-                name=f"{self.model._meta.app_label}_{self.model._meta.model_name}_sync",
-            ),
-        ]
-        total = custom_urls + urls
-        return total
-
 
 @admin.register(Trash)
 class TrashAdmin(EmailMessageAdmin):
     mailbox_type = StandardMailboxNames.TRASH
+    folder_filter = StandardMailboxNames.TRASH
 
     actions = (download_as_eml, restore_from_trash)
 
-    def get_queryset(self, request: HttpRequest):
-        qs = super().get_queryset(request)
-        return (
-            qs.select_related_mailbox()
-            .total_attachments()
-            .has_attachments()
-            .filter(mailbox__folder_type=StandardMailboxNames.TRASH)
-        )
-
     def has_add_permission(self, request: HttpRequest) -> bool:
         return False
 
@@ -529,48 +621,38 @@ class TrashAdmin(EmailMessageAdmin):
 
     def get_urls(self) -> list[URLPattern]:
         urls = super().get_urls()
-        custom_urls = [
-            path(
-                "sync-emails/trash/",
-                self.admin_site.admin_view(self.sync_emails),
-                name=f"{self.model._meta.app_label}_{self.model._meta.model_name}_sync",
-            ),
+        urls.insert(
+            0,
             path(
                 "clear-trash/",
                 self.admin_site.admin_view(self.clear_trash),
-                name=f"{self.model._meta.app_label}_{self.model._meta.model_name}_clear",
+                name=f"{self.url_name_prefix}_clear",
             ),
-        ]
-        total = custom_urls + urls
-        return total
+        )
+        return urls
 
-    @transaction.atomic
     def clear_trash(self, request: HttpRequest):
-        start_time = time.time()
-        try:
-            with IMAPClient(imap_host, imap_username, imap_password) as client:
-                trash_mailbox = Mailbox.objects.get(
-                    folder_type=StandardMailboxNames.TRASH
-                )
-                mailbox_service = IMAPMailboxUIDService(client)
-                mailbox_service.select(trash_mailbox.name)
-                email_ids = mailbox_service.uid_search(
-                    IMAPSearchCriteria.ALL, charset=None
-                )
-                client.uid(
-                    "STORE",
-                    MessageSet(email_ids).msg_ids,
-                    FlagCommand.ADD,
-                    Flag.DELETED,
-                )
-                mailbox_service.uid_delete(MessageSet(email_ids), trash_mailbox.name)
+        if imap_settings.IMAP_ASYNC_ACTIONS_ENABLED:
+            from sage_mailbox.tasks import clear_trash_task
 
-                EmailMessage.objects.filter(
-                    mailbox__folder_type=StandardMailboxNames.TRASH
-                ).delete()
-                logger.debug("Permanently deleted email messages from the database.")
+            result = clear_trash_task.delay(request.user.id)
+            self.message_user(
+                request,
+                _("Queued clearing the trash. Task ID: {}.").format(result.id),
+                messages.INFO,
+            )
+        else:
+            self._clear_trash_now(request)
 
-            end_time = time.time()
+        change_list_url = self.changelist_url
+        return HttpResponseRedirect(change_list_url)
+
+    def _clear_trash_now(self, request: HttpRequest):
+        start_time = time.monotonic()
+        try:
+            EmailActionService(*imap_credentials()).clear_trash()
+
+            end_time = time.monotonic()
             runtime = end_time - start_time
             self.message_user(
                 request,
@@ -581,9 +663,9 @@ class TrashAdmin(EmailMessageAdmin):
             )
 
         except Exception as e:
-            end_time = time.time()
+            end_time = time.monotonic()
             runtime = end_time - start_time
-            logger.error(f"Error clearing trash: {str(e)}", exc_info=True)
+            logger.error("Error clearing trash: %s", e, exc_info=True)
             self.message_user(
                 request,
                 _(
@@ -592,8 +674,3 @@ class TrashAdmin(EmailMessageAdmin):
                 ).format(runtime),
                 messages.ERROR,
             )
-        application_label = self.model._meta.app_label
-        change_list_url = reverse(
-            f"admin:{application_label}_{self.model._meta.model_name}_changelist"
-        )
-        return HttpResponseRedirect(change_list_url)
@@ -1,28 +1,64 @@
-from typing import Any
+import imaplib
+import logging
 
-from django.conf import settings
 from django.contrib import admin, messages
-from django.contrib.admin.models import LogEntry
 from django.core.exceptions import ValidationError
 from django.db import transaction
 from django.http import HttpRequest, HttpResponseRedirect
 from django.http.response import HttpResponse
 from django.urls import path, reverse
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 from sage_imap.exceptions import (
     IMAPFolderExistsError,
     IMAPFolderNotFoundError,
     IMAPFolderOperationError,
 )
-from sage_imap.services import IMAPClient, IMAPFolderService
+from sage_imap.services import IMAPFolderService
 
 from sage_mailbox.admin.actions import delete_selected
+from sage_mailbox.folder_cache import folder_cache
+from sage_mailbox.imap_pool import imap_pool
 from sage_mailbox.models.mailbox import Mailbox, StandardMailboxNames
+from sage_mailbox.utils import imap_credentials, map_to_standard_name
 
-# IMAP configuration
-imap_host = getattr(settings, "IMAP_SERVER_DOMAIN", None)
-imap_username = getattr(settings, "IMAP_SERVER_USER", None)
-imap_password = getattr(settings, "IMAP_SERVER_PASSWORD", None)
+logger = logging.getLogger(__name__)
+
+
+# Folder DELETE commands sent before reading their responses.
+FOLDER_DELETE_BATCH_SIZE = 1000
+
+
+def _pipelined_delete_folders(client, names):
+    """Delete IMAP folders with pipelined ``DELETE`` commands.
+
+    Up to ``FOLDER_DELETE_BATCH_SIZE`` commands are sent before the first
+    tagged response is read, so the deletion costs one round-trip per batch
+    instead of one per folder. Yields ``(status, response text)`` per name as
+    the responses arrive, so the folders handled before a failure are known. A
+    ``BAD`` response is yielded like any other; an aborted connection raises
+    with tags still unread, and the pool then discards the connection.
+    """
+    # The server unselects a deleted folder; forget the pooled selection.
+    client.selected_mailbox = None
+    for start in range(0, len(names), FOLDER_DELETE_BATCH_SIZE):
+        batch = names[start : start + FOLDER_DELETE_BATCH_SIZE]
+        tags = [client._command("DELETE", name) for name in batch]
+        for tag in tags:
+            try:
+                status, data = client._command_complete("DELETE", tag)
+            except imaplib.IMAP4.abort:
+                raise
+            except imaplib.IMAP4.error as exc:
+                yield "BAD", str(exc)
+                continue
+            text = data[0].decode("utf-8", "replace") if data and data[0] else ""
+            yield status, text
+
+
+def _invalidate_folder_cache():
+    host, username, _password = imap_credentials()
+    folder_cache.invalidate(host, username)
 
 
 @admin.register(Mailbox)
@@ -32,6 +68,7 @@ class MailboxAdmin(admin.ModelAdmin):
     search_fields = ("name",)
     ordering = ("name",)
     list_per_page = 25
+    show_full_result_count = False
     list_filter = ("folder_type", "created_at", "modified_at")
     fieldsets = (
         (None, {"fields": ("name", "slug", "folder_type")}),
@@ -40,48 +77,89 @@ class MailboxAdmin(admin.ModelAdmin):
     readonly_fields = ("created_at", "modified_at", "slug")
     actions = [delete_selected]
 
+    def get_queryset(self, request):
+        # Pin the loaded columns to the ones the changelist and form display.
+        return (
+            super()
+            .get_queryset(request)
+            .only("id", "name", "slug", "folder_type", "created_at", "modified_at")
+        )
+
     def get_readonly_fields(self, request, obj=None):
         if obj:  # Editing an existing object
             if obj.folder_type != StandardMailboxNames.CUSTOM:
                 return self.readonly_fields + ("name",)
         return self.readonly_fields
 
+    @staticmethod
+    def _stored_name(obj, form):
+        # The form keeps the stored name in its initial data; only a form
+        # without the field (read-only name) needs the database.
+        return (
+            form.initial.get("name") or Mailbox.objects.only("name").get(pk=obj.pk).name
+        )
+
     def save_model(self, request, obj, form, change):
-        new_name = form.cleaned_data.get("name")
+        new_name = form.cleaned_data.get("name", obj.name)
+        old_name = self._stored_name(obj, form) if change else None
 
         try:
-            with transaction.atomic():
-                with IMAPClient(imap_host, imap_username, imap_password) as client:
-                    folder_service = IMAPFolderService(client)
-                    if change:
-                        old_name = Mailbox.objects.get(pk=obj.pk).name
-                        if old_name != new_name:
-                            try:
-                                folder_service.rename_folder(old_name, new_name)
-                            except IMAPFolderNotFoundError:
-                                raise ValidationError(
-                                    _("The folder to be renamed does not exist.")
-                                )
-                            except IMAPFolderOperationError as e:
-                                raise ValidationError(str(e))
-                    else:
+            # The IMAP round-trips run before, not inside, the database
+            # transaction, so no connection or row lock is held while waiting.
+            with imap_pool.connection(*imap_credentials()) as client:
+                folder_service = IMAPFolderService(client)
+                if change:
+                    if old_name != new_name:
                         try:
-                            folder_service.create_folder(new_name)
-                        except IMAPFolderExistsError:
+                            folder_service.rename_folder(old_name, new_name)
+                        except IMAPFolderNotFoundError:
                             raise ValidationError(
-                                _("A folder with this name already exists.")
+                                _("The folder to be renamed does not exist.")
                             )
                         except IMAPFolderOperationError as e:
                             raise ValidationError(str(e))
+                else:
+                    try:
+                        folder_service.create_folder(new_name)
+                    except IMAPFolderExistsError:
+                        raise ValidationError(
+                            _("A folder with this name already exists.")
+                        )
+                    except IMAPFolderOperationError as e:
+                        raise ValidationError(str(e))
+            _invalidate_folder_cache()
+
+            try:
+                with transaction.atomic():
                     super().save_model(request, obj, form, change)
-                messages.success(
-                    request, f'The Mailbox "{new_name}" was added successfully.'
-                )
+            except Exception:
+                self._revert_folder_change(old_name, new_name)
+                raise
+            messages.success(
+                request, f'The Mailbox "{new_name}" was added successfully.'
+            )
         except ValidationError as e:
             messages.error(request, f"Error: {e.message}")
         except Exception as e:
             messages.error(request, f"Unexpected error: {str(e)}")
 
+    def _revert_folder_change(self, old_name, new_name):
+        """Undo a folder create or rename on the server after the save failed."""
+        try:
+            with imap_pool.connection(*imap_credentials()) as client:
+                folder_service = IMAPFolderService(client)
+                if old_name is None:
+                    folder_service.delete_folder(new_name)
+                elif old_name != new_name:
+                    folder_service.rename_folder(new_name, old_name)
+        except Exception:
+            logger.error(
+                "Could not revert IMAP folder %s after a failed save.",
+                new_name,
+                exc_info=True,
+            )
+        _invalidate_folder_cache()
+
     def get_urls(self):
         urls = super().get_urls()
         custom_urls = [
@@ -95,62 +173,96 @@ class MailboxAdmin(admin.ModelAdmin):
 
     def delete_model(self, request, obj):
         try:
-            with transaction.atomic():
-                with IMAPClient(imap_host, imap_username, imap_password) as client:
-                    folder_service = IMAPFolderService(client)
-                    try:
-                        folder_service.delete_folder(obj.name)
-                    except IMAPFolderNotFoundError:
-                        super().delete_model(request, obj)
-                        messages.warning(
-                            request,
-                            f'The Mailbox "{obj.name}" was deleted from admin, '
-                            "but it did not exist on the IMAP server.",
-                        )
-                    except IMAPFolderOperationError as e:
-                        raise ValidationError(str(e))
-                    else:
-                        super().delete_model(request, obj)
-                        messages.success(
-                            request,
-                            f'The Mailbox "{obj.name}" was deleted successfully '
-                            "from both admin and IMAP server.",
-                        )
-        except ValidationError as e:
-            messages.error(request, f"Error: {e.message}")
-        except Exception as e:
-            messages.error(request, f"Unexpected error: {str(e)}")
+            with imap_pool.connection(*imap_credentials()) as client:
+                folder_service = IMAPFolderService(client)
+                _invalidate_folder_cache()
+                try:
+                    folder_service.delete_folder(obj.name)
+                except IMAPFolderNotFoundError:
+                    exists_on_server = False
+                except IMAPFolderOperationError as e:
+                    raise ValidationError(str(e))
+                else:
+                    exists_on_server = True
 
-    def delete_queryset(self, request, queryset):
-        try:
             with transaction.atomic():
-                with IMAPClient(imap_host, imap_username, imap_password) as client:
-                    folder_service = IMAPFolderService(client)
-                    for obj in queryset:
-                        try:
-                            folder_service.delete_folder(obj.name)
-                        except IMAPFolderNotFoundError:
-                            super().delete_model(request, obj)
-                            messages.warning(
-                                request,
-                                f'The mailbox "{obj.name}" was deleted from admin, '
-                                "but it did not exist on the IMAP server.",
-                            )
-                        except IMAPFolderOperationError as e:
-                            raise ValidationError(str(e))
-                        else:
-                            super().delete_model(request, obj)
-                    super().delete_queryset(request, queryset)
+                super().delete_model(request, obj)
+            if exists_on_server:
                 messages.success(
                     request,
-                    "The selected Mailboxes were deleted successfully "
+                    f'The Mailbox "{obj.name}" was deleted successfully '
                     "from both admin and IMAP server.",
                 )
+            else:
+                messages.warning(
+                    request,
+                    f'The Mailbox "{obj.name}" was deleted from admin, '
+                    "but it did not exist on the IMAP server.",
+                )
         except ValidationError as e:
             messages.error(request, f"Error: {e.message}")
         except Exception as e:
             messages.error(request, f"Unexpected error: {str(e)}")
 
+    def delete_queryset(self, request, queryset):
+        mailboxes = list(queryset.only("id", "name"))
+        responses = []
+        try:
+            with imap_pool.connection(*imap_credentials()) as client:
+                _invalidate_folder_cache()
+                for response in _pipelined_delete_folders(
+                    client, [mailbox.name for mailbox in mailboxes]
+                ):
+                    responses.append(response)
+        except Exception as e:
+            # Folders answered before the failure are still handled below;
+            # the rest are kept, since their outcome on the server is unknown.
+            messages.error(request, f"Unexpected error: {str(e)}")
+
+        deleted_ids = []
+        missing_names = []
+        errors = []
+        for mailbox, (status, response) in zip(mailboxes, responses, strict=False):
+            if status == "OK":
+                deleted_ids.append(mailbox.pk)
+            elif response.startswith("[NONEXISTENT]"):
+                deleted_ids.append(mailbox.pk)
+                missing_names.append(mailbox.name)
+            else:
+                errors.append(f'"{mailbox.name}": {response}')
+
+        # One DELETE for every folder the server removed (or never had).
+        with transaction.atomic():
+            queryset.model.objects.filter(pk__in=deleted_ids).delete()
+
+        # At most one message per outcome, however many mailboxes were selected.
+        if missing_names:
+            messages.warning(
+                request,
+                "These mailboxes were deleted from admin, but they did not exist "
+                "on the IMAP server: {}.".format(
+                    ", ".join(f'"{name}"' for name in missing_names)
+                ),
+            )
+        if errors:
+            messages.error(
+                request, "Error deleting mailboxes: {}".format("; ".join(errors))
+            )
+        if len(deleted_ids) == len(mailboxes):
+            messages.success(
+                request,
+                "The selected Mailboxes were deleted successfully "
+                "from both admin and IMAP server.",
+            )
+
+    @cached_property
+    def changelist_url(self):
+        """The changelist URL, resolved once per admin instance."""
+        return reverse(
+            "admin:{}_{}_changelist".format(self.opts.app_label, self.opts.model_name),
+            current_app=self.admin_site.name,
+        )
+
     def response_add(self, request, obj, post_url_continue=None):
         """
         Handles the HTTP response after adding a new object in the Django admin.
@@ -163,13 +275,7 @@ class MailboxAdmin(admin.ModelAdmin):
         elif "_addanother" in request.POST:
             return HttpResponseRedirect(request.path)
         elif "_save" in request.POST:
-            post_url = reverse(
-                "admin:{}_{}_changelist".format(
-                    self.opts.app_label, self.opts.model_name
-                ),
-                current_app=self.admin_site.name,
-            )
-            return HttpResponseRedirect(post_url)
+            return HttpResponseRedirect(self.changelist_url)
         return HttpResponseRedirect(self.get_success_url(request, obj))
 
     def response_change(self, request, obj):
@@ -186,23 +292,13 @@ class MailboxAdmin(admin.ModelAdmin):
         elif "_addanother" in request.POST:
             return HttpResponseRedirect(request.path)
         elif "_save" in request.POST:
-            post_url = reverse(
-                "admin:{}_{}_changelist".format(
-                    self.opts.app_label, self.opts.model_name
-                ),
-                current_app=self.admin_site.name,
-            )
-            return HttpResponseRedirect(post_url)
+            return HttpResponseRedirect(self.changelist_url)
         return HttpResponseRedirect(self.get_success_url(request, obj))
 
     def response_delete(
         self, request: HttpRequest, obj_display: str, obj_id: int
     ) -> HttpResponse:
-        post_url = reverse(
-            "admin:{}_{}_changelist".format(self.opts.app_label, self.opts.model_name),
-            current_app=self.admin_site.name,
-        )
-        return HttpResponseRedirect(post_url)
+        return HttpResponseRedirect(self.changelist_url)
 
     def get_success_url(self, request, obj):
         return request.META.get("HTTP_REFERER", "/admin/")
@@ -210,19 +306,26 @@ class MailboxAdmin(admin.ModelAdmin):
     def sync_folders(self, request):
         """Synchronizes the mailboxes between the IMAP server and the Django admin."""
         try:
-            with IMAPClient(imap_host, imap_username, imap_password) as client:
-                folder_service = IMAPFolderService(client)
-                folders = folder_service.list_folders()
-                for folder_name in folders:
-                    Mailbox.objects.update_or_create(
-                        name=folder_name, defaults={"slug": folder_name.lower()}
-                    )
-                messages.success(request, "Mailboxes synchronized successfully.")
+            folders = folder_cache.list_folders(*imap_credentials())
+            # One SELECT for the known names and one INSERT for the new ones.
+            # bulk_create skips Mailbox.save(), so set the folder type here.
+            existing = set(
+                Mailbox.objects.filter(name__in=folders).values_list("name", flat=True)
+            )
+            new_mailboxes = [
+                Mailbox(
+                    name=folder_name,
+                    folder_type=map_to_standard_name(folder_name),
+                )
+                for folder_name in dict.fromkeys(folders)
+                if folder_name not in existing
+            ]
+            with transaction.atomic():
+                # Names such as "Work.Items" and "Work Items" share a slug;
+                # bulk_create skips the save() that would resolve it.
+                Mailbox._meta.get_field("slug").assign_unique_slugs(new_mailboxes)
+                Mailbox.objects.bulk_create(new_mailboxes, batch_size=500)
+            messages.success(request, "Mailboxes synchronized successfully.")
         except Exception as e:
             messages.error(request, f"Unexpected error: {str(e)}")
         return HttpResponseRedirect(request.META.get("HTTP_REFERER", "/admin/"))
-
-    def log_deletion(
-        self, request: HttpRequest, obj: Any, object_repr: str
-    ) -> LogEntry:
-        return super().log_deletion(request, obj, object_repr)
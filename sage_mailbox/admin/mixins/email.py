@@ -1,6 +1,5 @@
 import time
 
-from django.conf import settings
 from django.contrib import messages
 from django.core.exceptions import ObjectDoesNotExist
 from django.shortcuts import redirect
@@ -9,10 +8,7 @@ from django.urls.resolvers import URLPattern
 
 from sage_mailbox.models import Mailbox
 from sage_mailbox.repository.service import EmailSyncService
-
-imap_host = settings.IMAP_SERVER_DOMAIN
-imap_username = settings.IMAP_SERVER_USER
-imap_password = settings.IMAP_SERVER_PASSWORD
+from sage_mailbox.utils import imap_credentials
 
 
 class EmailSyncMixin:
@@ -33,7 +29,7 @@ class EmailSyncMixin:
         return custom_urls + urls
 
     def sync_emails(self, request):
-        start_time = time.time()
+        start_time = time.monotonic()
 
         try:
             mailbox = Mailbox.objects.get(folder_type=self.mailbox_name)
@@ -49,10 +45,10 @@ class EmailSyncMixin:
             )
             return redirect(change_list_url)
 
-        service = EmailSyncService(imap_host, imap_username, imap_password)
+        service = EmailSyncService(*imap_credentials())
         result = service.fetch_and_save_emails(mailbox.name)
 
-        end_time = time.time()
+        end_time = time.monotonic()
         runtime = end_time - start_time
 
         created_emails = result.get("created_emails", 0)
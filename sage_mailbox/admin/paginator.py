@@ -0,0 +1,34 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+
+class LargeTablePaginator(Paginator):
+    """
+    Paginator that estimates the size of large unfiltered PostgreSQL tables.
+
+    ``COUNT(*)`` scans the whole table on PostgreSQL, which dominates the
+    changelist load time of a large mailbox. For an unfiltered queryset the
+    planner statistic ``pg_class.reltuples`` is used instead once it reaches
+    ``estimate_threshold`` rows. Filtered querysets, small tables and other
+    database backends keep the exact count.
+    """
+
+    estimate_threshold = 10_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            connection = connections[queryset.db]
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT reltuples FROM pg_class WHERE relname = %s",
+                        [queryset.model._meta.db_table],
+                    )
+                    row = cursor.fetchone()
+                if row and row[0] >= self.estimate_threshold:
+                    return int(row[0])
+        return super().count
@@ -1,8 +1,11 @@
 import imaplib
 import logging
+import socket
+from functools import lru_cache
 
 from django.conf import settings
 from django.core.checks import Error, Warning, register
+from sage_imap import exceptions as sage_imap_exceptions
 
 from sage_mailbox.conf import imap_settings
 from sage_mailbox.exc import (
@@ -11,6 +14,7 @@ from sage_mailbox.exc import (
     IMAPConnectionError,
     IMAPUnexpectedError,
 )
+from sage_mailbox.imap_pool import imap_pool
 
 logger = logging.getLogger(__name__)
 
@@ -21,22 +25,24 @@ def check_imap_config(app_configs, **kwargs):
     Check the IMAP configuration and other required settings for the application.
 
     This function verifies that all required IMAP settings, Django apps, and certain
-    settings are present. It also attempts to establish a connection to the IMAP server
-    to ensure the settings are correct. Any errors encountered during these checks
-    are returned.
+    settings are present. For ``check --deploy``, or when ``IMAP_CHECK_CONNECTION``
+    is enabled, it also logs in to the IMAP server to ensure the settings are
+    correct, reusing a pooled connection when one is idle; otherwise it only
+    checks that the server accepts TCP connections, cached for the process. Any
+    errors encountered during these checks are returned.
 
     Parameters
     ----------
     app_configs : dict
         The application configurations.
     **kwargs
-        Additional keyword arguments.
+        Additional keyword arguments; ``deploy`` enables the connection probe.
 
     Returns
     -------
     list of Error or Warning
         A list of Error or Warning objects representing any configuration or connection
-        errors found.
+        errors found. An unreachable server is reported as a Warning.
 
     Raises
     ------
@@ -125,38 +131,89 @@ def check_imap_config(app_configs, **kwargs):
             )
         )
 
-    # Check IMAP connection
-    try:
-        mail = imaplib.IMAP4_SSL(
-            imap_settings_dict["IMAP_SERVER_DOMAIN"],
-            imap_settings_dict["IMAP_SERVER_PORT"],
+    # A full probe costs a TLS handshake and LOGIN, so it only runs for
+    # ``check --deploy`` or when explicitly enabled; otherwise one TCP
+    # handshake confirms the server is reachable.
+    if not (kwargs.get("deploy") or imap_settings.IMAP_CHECK_CONNECTION):
+        errors.extend(
+            _probe_imap_reachability(
+                imap_settings_dict["IMAP_SERVER_DOMAIN"],
+                imap_settings_dict["IMAP_SERVER_PORT"],
+            )
         )
-        mail.login(
+        return errors
+
+    errors.extend(
+        _probe_imap_connection(
+            imap_settings_dict["IMAP_SERVER_DOMAIN"],
             imap_settings_dict["IMAP_SERVER_USER"],
             imap_settings_dict["IMAP_SERVER_PASSWORD"],
         )
-        mail.logout()
-    except imaplib.IMAP4.error as e:
-        if "authentication failed" in str(e).lower():
-            errors.append(
-                Error(
-                    str(IMAPAuthenticationError()),
-                    id="sage_integration.E007",
-                )
-            )
-        else:
-            errors.append(
-                Error(
-                    str(IMAPConnectionError(detail=str(e))),
-                    id="sage_integration.E005",
-                )
-            )
+    )
+    return errors
+
+
+# Seconds to wait for the TCP handshake of the reachability check.
+REACHABILITY_TIMEOUT = 2
+
+
+@lru_cache(maxsize=None)
+def _probe_imap_reachability(host, port):
+    """Open and close a TCP connection to the IMAP server once per process."""
+    try:
+        port = int(port)
+    except (TypeError, ValueError) as e:
+        return (
+            Error(
+                str(IMAPUnexpectedError(detail=f"Invalid IMAP port {port!r}: {e}")),
+                id="sage_integration.E006",
+            ),
+        )
+    try:
+        socket.create_connection((host, port), timeout=REACHABILITY_TIMEOUT).close()
+    except OSError as e:
+        return (
+            Warning(
+                f"The IMAP server {host}:{port} is not reachable: {e}",
+                id="sage_integration.W001",
+            ),
+        )
+    return ()
+
+
+def _probe_imap_connection(host, username, password):
+    """Log in to the IMAP server through the pool and return the errors found.
+
+    The connection goes back to ``imap_pool``, so a later check run or the
+    first admin action reuses it instead of paying the TLS handshake and LOGIN
+    again. A connection that fails is discarded by the pool.
+    """
+    try:
+        with imap_pool.connection(host, username, password):
+            pass
+    except sage_imap_exceptions.IMAPAuthenticationError:
+        return (
+            Error(
+                str(IMAPAuthenticationError()),
+                id="sage_integration.E007",
+            ),
+        )
+    except (
+        sage_imap_exceptions.IMAPConnectionError,
+        imaplib.IMAP4.error,
+        OSError,
+    ) as e:
+        return (
+            Error(
+                str(IMAPConnectionError(detail=str(e))),
+                id="sage_integration.E005",
+            ),
+        )
     except Exception as e:
-        errors.append(
+        return (
             Error(
                 str(IMAPUnexpectedError(detail=str(e))),
                 id="sage_integration.E006",
-            )
+            ),
         )
-
-    return errors
+    return ()
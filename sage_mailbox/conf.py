@@ -16,13 +16,9 @@ class IMAPSettings:
                     f"{setting} must be set in your Django settings."
                 )
             self._settings[setting] = value
-
-    def __getattr__(self, item):
-        if item in self._settings:
-            return self._settings[item]
-        raise AttributeError(
-            f"'{self.__class__.__name__}' object has no attribute '{item}'"
-        )
+        # Settings do not change at runtime; plain attributes make every read a
+        # regular instance lookup instead of a ``__getattr__`` fallback.
+        self.__dict__.update(self._settings)
 
 
 imap_settings = IMAPSettings()
@@ -4,4 +4,14 @@ DEFAULTS = {
     "IMAP_SERVER_USER": None,
     "IMAP_SERVER_PASSWORD": None,
     "IMAP_DEBUG_ENABLED": True,
+    "IMAP_ASYNC_ACTIONS_ENABLED": False,
+    "IMAP_POOL_MAX_CONNECTIONS": 4,
+    "IMAP_POOL_IDLE_TIMEOUT": 300,
+    "IMAP_TLS_SESSION_REUSE": False,
+    "IMAP_SEEN_FLAG_DEBOUNCE": 0,
+    "IMAP_ADMIN_FULL_TEXT_SEARCH": False,
+    "IMAP_FOLDER_LIST_CACHE_TTL": 30,
+    "IMAP_CHECK_CONNECTION": False,
+    "IMAP_FETCH_BATCH_SIZE": 100,
+    "IMAP_ATTACHMENT_UPLOAD_WORKERS": 8,
 }
@@ -1,4 +1,5 @@
 import uuid
+from functools import cached_property
 
 
 class SageError(Exception):
@@ -34,7 +35,11 @@ class SageError(Exception):
         self.detail = detail
         self.code = code
         self.section_code = section_code
-        self.error_id = str(uuid.uuid4())
+
+    @cached_property
+    def error_id(self):
+        # Generated on first use; most raised errors are never reported.
+        return str(uuid.uuid4())
 
     def __str__(self):
         return f"Error {self.section_code}{self.code} - {self.detail} (Error ID: {self.error_id})"
@@ -0,0 +1,69 @@
+import threading
+import time
+from concurrent.futures import Future
+
+from sage_imap.services import IMAPFolderService
+
+from sage_mailbox.conf import imap_settings
+from sage_mailbox.imap_pool import imap_pool
+
+
+class FolderListCache:
+    """
+    Short-lived, process-wide cache of IMAP folder listings.
+
+    Listings are keyed by ``(host, username)`` and kept for ``ttl`` seconds.
+    Requests that miss the cache while a ``LIST`` for the same key is in flight
+    wait for that result instead of sending their own command.
+
+    Parameters
+    ----------
+    ttl : float
+        Seconds a listing is served from the cache.
+
+    Examples
+    --------
+    >>> folders = folder_cache.list_folders(host, username, password)
+    """
+
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._listings = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def list_folders(self, host, username, password):
+        """Return the folder names on the server, listing them at most once per TTL."""
+        key = (host, username)
+        with self._lock:
+            cached = self._listings.get(key)
+            if cached and time.monotonic() - cached[0] < self.ttl:
+                return cached[1]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            with imap_pool.connection(host, username, password) as client:
+                folders = IMAPFolderService(client).list_folders()
+        except Exception as exc:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(exc)
+            raise
+        with self._lock:
+            self._listings[key] = (time.monotonic(), folders)
+            del self._inflight[key]
+        future.set_result(folders)
+        return folders
+
+    def invalidate(self, host, username):
+        """Drop the cached listing after a folder was created, renamed or deleted."""
+        with self._lock:
+            self._listings.pop((host, username), None)
+
+
+folder_cache = FolderListCache(ttl=imap_settings.IMAP_FOLDER_LIST_CACHE_TTL)
@@ -0,0 +1,235 @@
+import imaplib
+import logging
+import ssl
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from sage_imap.exceptions import IMAPAuthenticationError, IMAPConnectionError
+from sage_imap.services import IMAPClient
+
+from sage_mailbox.conf import imap_settings
+
+logger = logging.getLogger(__name__)
+
+
+class SelectCachingConnection:
+    """
+    Proxy to a pooled ``imaplib`` connection that skips redundant ``SELECT``s.
+
+    The selected mailbox survives between pool checkouts, so selecting the
+    folder that is already selected returns the previous response instead of
+    another round-trip and discards the untagged responses collected since.
+    ``CLOSE``, ``UNSELECT``, read-only selects and folder renames or deletes
+    reset it.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+        self.selected_mailbox = None
+        self._select_response = None
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def select(self, mailbox="INBOX", readonly=False):
+        if not readonly and mailbox == self.selected_mailbox:
+            # imaplib only resets untagged data inside select(); drop what
+            # earlier commands left so it cannot pile up or look current.
+            self._connection.untagged_responses.clear()
+            return self._select_response
+
+        self.selected_mailbox = None
+        response = self._connection.select(mailbox, readonly)
+        if response[0] == "OK" and not readonly:
+            self.selected_mailbox = mailbox
+            self._select_response = response
+        return response
+
+    def close(self):
+        self.selected_mailbox = None
+        return self._connection.close()
+
+    def unselect(self):
+        self.selected_mailbox = None
+        return self._connection.unselect()
+
+    def rename(self, old_mailbox, new_mailbox):
+        self.selected_mailbox = None
+        return self._connection.rename(old_mailbox, new_mailbox)
+
+    def delete(self, mailbox):
+        self.selected_mailbox = None
+        return self._connection.delete(mailbox)
+
+
+class _ResumableIMAP4SSL(imaplib.IMAP4_SSL):
+    """``IMAP4_SSL`` that offers a previous TLS session to the server."""
+
+    def __init__(self, host, port=imaplib.IMAP4_SSL_PORT, *, ssl_context, session):
+        self._tls_session = session
+        super().__init__(host, port, ssl_context=ssl_context)
+
+    def _create_socket(self, timeout):
+        sock = imaplib.IMAP4._create_socket(self, timeout)
+        return self.ssl_context.wrap_socket(
+            sock, server_hostname=self.host, session=self._tls_session
+        )
+
+
+class TLSResumingIMAPClient(IMAPClient):
+    """
+    ``IMAPClient`` that connects with a shared ``SSLContext`` and TLS session.
+
+    Resuming the previous session replaces the full key exchange with an
+    abbreviated handshake; a server that declines simply performs a full one.
+    """
+
+    def __init__(self, host, username, password, ssl_context, session=None):
+        super().__init__(host, username, password)
+        self.ssl_context = ssl_context
+        self.session = session
+
+    def connect(self):
+        try:
+            self.connection = _ResumableIMAP4SSL(
+                self.host, ssl_context=self.ssl_context, session=self.session
+            )
+        except (OSError, imaplib.IMAP4.error) as e:
+            logger.error("Failed to establish IMAP connection: %s", e)
+            raise IMAPConnectionError("Failed to establish IMAP connection.") from e
+
+        try:
+            self.connection.login(self.username, self.password)
+        except imaplib.IMAP4.error as e:
+            logger.error("IMAP login failed: %s", e)
+            raise IMAPAuthenticationError("IMAP login failed.") from e
+
+        return self.connection
+
+
+class IMAPConnectionPool:
+    """
+    Process-wide pool of logged-in IMAP connections.
+
+    Connections are keyed by ``(host, username)`` and handed out exclusively, so
+    concurrent admin requests never share a socket. An idle connection is
+    checked with ``NOOP`` before reuse and dropped once it has been idle longer
+    than ``idle_timeout`` seconds, which saves the TCP, TLS and LOGIN round-trips
+    on every action. Connections are wrapped in ``SelectCachingConnection`` so
+    the mailbox selected by the previous user is not selected again.
+
+    Parameters
+    ----------
+    max_size : int
+        Maximum number of idle connections kept per ``(host, username)``.
+    idle_timeout : float
+        Seconds after which an idle connection is logged out instead of reused.
+    tls_session_reuse : bool
+        Open new connections with one shared ``SSLContext`` and resume the last
+        TLS session negotiated with the host.
+
+    Examples
+    --------
+    >>> with imap_pool.connection(host, username, password) as client:
+    ...     client.select("INBOX")
+    """
+
+    def __init__(self, max_size=4, idle_timeout=300, tls_session_reuse=False):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.tls_session_reuse = tls_session_reuse
+        self._ssl_context = None
+        self._tls_sessions = {}
+        self._idle = defaultdict(list)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self, host, username, password):
+        """Yield a logged-in ``imaplib`` connection and return it to the pool."""
+        key = (host, username)
+        client = self._acquire(key, password)
+        try:
+            yield client.connection
+        except Exception:
+            # The connection may be left in an unknown state; never reuse it.
+            self._close(client)
+            raise
+        self._release(key, client)
+
+    def close_all(self):
+        """Log out every idle connection held by the pool."""
+        with self._lock:
+            clients = [client for idle in self._idle.values() for client, _ in idle]
+            self._idle.clear()
+        for client in clients:
+            self._close(client)
+
+    def _acquire(self, key, password):
+        while True:
+            with self._lock:
+                idle = self._idle[key]
+                if not idle:
+                    break
+                client, last_used = idle.pop()
+
+            if time.monotonic() - last_used > self.idle_timeout:
+                self._close(client)
+                continue
+            try:
+                client.connection.noop()
+            except Exception:
+                logger.debug("Discarding stale IMAP connection to %s.", key[0])
+                self._close(client)
+                continue
+            return client
+
+        host, username = key
+        client = self._connect(host, username, password)
+        client.connection = SelectCachingConnection(client.connection)
+        logger.debug("Opened new pooled IMAP connection to %s.", host)
+        return client
+
+    def _connect(self, host, username, password):
+        if not self.tls_session_reuse:
+            client = IMAPClient(host, username, password)
+            client.connect()
+            return client
+
+        if self._ssl_context is None:
+            # The same defaults ``imaplib.IMAP4_SSL`` applies without a context.
+            self._ssl_context = ssl._create_stdlib_context()
+        client = TLSResumingIMAPClient(
+            host,
+            username,
+            password,
+            ssl_context=self._ssl_context,
+            session=self._tls_sessions.get(host),
+        )
+        client.connect()
+        self._tls_sessions[host] = client.connection.sock.session
+        return client
+
+    def _release(self, key, client):
+        # Untagged FETCH/EXISTS data is never read once the caller is done.
+        client.connection.untagged_responses.clear()
+        with self._lock:
+            idle = self._idle[key]
+            if len(idle) < self.max_size:
+                idle.append((client, time.monotonic()))
+                return
+        self._close(client)
+
+    def _close(self, client):
+        try:
+            client.disconnect()
+        except Exception:
+            logger.debug("Error while closing pooled IMAP connection.", exc_info=True)
+
+
+imap_pool = IMAPConnectionPool(
+    max_size=imap_settings.IMAP_POOL_MAX_CONNECTIONS,
+    idle_timeout=imap_settings.IMAP_POOL_IDLE_TIMEOUT,
+    tls_session_reuse=imap_settings.IMAP_TLS_SESSION_REUSE,
+)
@@ -2,6 +2,9 @@ import mimetypes
 
 from django.core.files.storage import FileSystemStorage
 from django.db import models
+from django.db.models import F
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
 from sage_mailbox.models.mixins import TimestampMixin
@@ -36,7 +39,6 @@ class Attachment(TimestampMixin):
         help_text=_("The MIME type of the attachment."),
         db_comment="The MIME type of the attachment.",
     )
-    payload = models.BinaryField()
     content_id = models.CharField(max_length=255, blank=True, null=True)
     content_transfer_encoding = models.CharField(max_length=255, blank=True, null=True)
 
@@ -55,5 +57,35 @@ class Attachment(TimestampMixin):
             self.content_type, _ = mimetypes.guess_type(self.file.name)
         super().save(*args, **kwargs)
 
+    def delete(self, *args, **kwargs):
+        from sage_mailbox.models import EmailMessage
+
+        # Kept here rather than in a post_delete receiver, which would stop
+        # Django from fast-deleting attachments when their email is deleted.
+        result = super().delete(*args, **kwargs)
+        EmailMessage.objects.filter(
+            pk=self.email_message_id, attachment_count__gt=0
+        ).update(attachment_count=F("attachment_count") - 1)
+        return result
+
     def __str__(self):
         return str(self.filename) or "Attachment"
+
+    @property
+    def payload(self):
+        """The attachment bytes, read from ``file`` on demand."""
+        if not self.file:
+            return b""
+        with self.file.open("rb") as file:
+            return file.read()
+
+
+# pylint: disable=W0613
+@receiver(post_save, sender=Attachment)
+def increment_attachment_count(sender, instance, created, **kwargs):
+    from sage_mailbox.models import EmailMessage
+
+    if created:
+        EmailMessage.objects.filter(pk=instance.email_message_id).update(
+            attachment_count=F("attachment_count") + 1
+        )
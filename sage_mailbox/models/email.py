@@ -1,5 +1,6 @@
 import re
 
+from django.core.files.base import ContentFile
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django_jsonform.models.fields import JSONField
@@ -7,8 +8,12 @@ from sage_imap.models.email import EmailMessage as EmailMessageDC
 
 from sage_mailbox.models.mixins import TimestampMixin
 from sage_mailbox.repository import EmailMessageManager
+from sage_mailbox.utils import sanitize_filename
 from sage_mailbox.validators import validate_comma_separated_email
 
+MESSAGE_ID_PATTERN = re.compile(r"<([^>]*)>")
+LEADING_BACKSLASHES_PATTERN = re.compile(r"^\\+")
+
 
 class EmailMessage(TimestampMixin):
     HEADER_JSON_SCHEMA = {
@@ -117,12 +122,14 @@ class EmailMessage(TimestampMixin):
     )
     is_read = models.BooleanField(
         default=False,
+        db_index=True,
         help_text=_("Indicates if the email has been read."),
         db_comment="Indicates whether the email has been read.",
         verbose_name=_("Is Read"),
     )
     is_flagged = models.BooleanField(
         default=False,
+        db_index=True,
         help_text=_("Indicates if the email has been flagged."),
         db_comment="Indicates whether the email has been flagged.",
         verbose_name=_("Is Flagged"),
@@ -135,6 +142,14 @@ class EmailMessage(TimestampMixin):
         help_text=_("Size of the email in bytes."),
         db_comment="Size of the email in bytes.",
     )
+    attachment_count = models.PositiveIntegerField(
+        default=0,
+        db_index=True,
+        editable=False,
+        verbose_name=_("Total Attachments"),
+        help_text=_("Number of attachments stored for the email."),
+        db_comment="Denormalized number of attachments stored for the email.",
+    )
 
     objects = EmailMessageManager()
 
@@ -150,6 +165,28 @@ class EmailMessage(TimestampMixin):
             models.Index(fields=["subject"], name="idx_email_subject"),
             models.Index(fields=["from_address"], name="idx_email_from_address"),
             models.Index(fields=["date"], name="idx_email_date"),
+            # The admin lists one mailbox newest first, often narrowed to
+            # unread or flagged mail; the partial indexes only hold those rows.
+            models.Index(fields=["mailbox", "-date"], name="idx_email_mailbox_date"),
+            models.Index(
+                fields=["mailbox", "-date"],
+                condition=models.Q(is_read=False),
+                name="idx_email_unread",
+            ),
+            models.Index(
+                fields=["mailbox", "-date"],
+                condition=models.Q(is_flagged=True),
+                name="idx_email_flagged",
+            ),
+        ]
+        constraints = [
+            # UIDs are only unique within a mailbox; this also indexes the
+            # (mailbox, uid) lookups of the sync.
+            models.UniqueConstraint(
+                fields=["mailbox", "uid"],
+                condition=models.Q(uid__isnull=False),
+                name="uniq_email_mailbox_uid",
+            ),
         ]
 
         permissions = [
@@ -183,40 +220,49 @@ class EmailMessage(TimestampMixin):
             to_address=", ".join(email_dc.to_address),
             cc_address=", ".join(email_dc.cc_address),
             bcc_address=", ".join(email_dc.bcc_address),
-            date=email_dc.date.isoformat() if email_dc.date else None,
+            # Already an ISO 8601 string (``EmailDate``); the field parses it.
+            date=email_dc.date,
             raw=email_dc.raw,
             plain_body=email_dc.plain_body,
             html_body=email_dc.html_body,
             size=email_dc.size,
+            attachment_count=len(email_dc.attachments),
         )
         email.save()
         # Process and clean up flags
-        cleaned_flags = [re.sub(r"^\\+", "", flag.value) for flag in email_dc.flags]
-
-        # Get existing flags from the database
-        existing_flags = {
-            flag.name: flag for flag in Flag.objects.filter(name__in=cleaned_flags)
+        cleaned_flags = {
+            LEADING_BACKSLASHES_PATTERN.sub("", flag.value) for flag in email_dc.flags
         }
 
-        # Find flags that need to be created
-        new_flag_values = set(cleaned_flags) - set(existing_flags.keys())
-
-        # Bulk create new flags
-        new_flags = [Flag(name=value) for value in new_flag_values]
-        Flag.objects.bulk_create(new_flags)
-
-        # Retrieve all flags again (including newly created ones)
-        all_flags = Flag.objects.filter(name__in=cleaned_flags)
+        # Get existing flag ids, creating and looking up only the missing ones
+        flag_ids = dict(
+            Flag.objects.filter(name__in=cleaned_flags).values_list("name", "id")
+        )
+        new_flag_values = cleaned_flags - flag_ids.keys()
+        if new_flag_values:
+            Flag.objects.bulk_create([Flag(name=value) for value in new_flag_values])
+            flag_ids.update(
+                Flag.objects.filter(name__in=new_flag_values).values_list("name", "id")
+            )
 
-        # Associate flags with the email
-        email.flags.set(all_flags)
+        # The email is new, so its flag links can be inserted without a diff
+        through = cls.flags.through
+        through.objects.bulk_create(
+            [
+                through(emailmessage_id=email.pk, flag_id=flag_id)
+                for flag_id in flag_ids.values()
+            ]
+        )
         # Handling attachments
         attachments = [
             Attachment(
-                email=email,
+                email_message=email,
                 filename=attachment.filename,
                 content_type=attachment.content_type,
-                payload=attachment.payload,
+                # Stored once, in ``file``; the row only keeps its name.
+                file=ContentFile(
+                    attachment.payload, name=sanitize_filename(attachment.filename)
+                ),
                 content_id=attachment.content_id,
                 content_transfer_encoding=attachment.content_transfer_encoding,
             )
@@ -228,7 +274,11 @@ class EmailMessage(TimestampMixin):
         return email
 
     def to_dataclass(self):
-        """Convert a Django model instance to a dataclass instance."""
+        """Convert a Django model instance to a dataclass instance.
+
+        Load emails with ``EmailMessage.objects.with_full_context()`` when
+        converting many, so attachments and flags come from prefetched rows.
+        """
         from sage_imap.models.email import Attachment
         from sage_imap.models.email import EmailMessage as EmailMessageDC
 
@@ -262,8 +312,7 @@ class EmailMessage(TimestampMixin):
 
     @classmethod
     def sanitize_message_id(cls, message_id):
-        pattern = r"<([^>]*)>"
-        match = re.search(pattern, message_id)
+        match = MESSAGE_ID_PATTERN.search(message_id)
 
         if match:
             sanitized_message_id = "<" + match.group(1) + ">"
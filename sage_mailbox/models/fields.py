@@ -0,0 +1,86 @@
+import re
+
+from autoslug import AutoSlugField, utils
+
+
+class UniqueAutoSlugField(AutoSlugField):
+    """
+    ``AutoSlugField`` that leaves slug collisions to the unique constraint.
+
+    The stock field tries ``slug``, ``slug-2``, ``slug-3``... with one query per
+    candidate on every save. This field saves the plain slug, or keeps the
+    ``slug-N`` variant the instance already has, without querying; the model
+    catches the ``IntegrityError`` of a collision and retries with
+    ``unique_slug``, which loads every taken ``slug`` and ``slug-N`` value at
+    once and appends the next free index. ``bulk_create`` never reaches that
+    retry, so rows inserted in bulk get their slugs from ``assign_unique_slugs``
+    first.
+    """
+
+    def pre_save(self, instance, add):
+        if self.unique_with or not self.unique:
+            return super().pre_save(instance, add)
+
+        current = self.value_from_object(instance)
+        value = current
+        if self.always_update or (self.populate_from and not value):
+            value = utils.get_prepopulated_value(self, instance)
+
+        slug = (self.slugify(value) if value else None) or instance._meta.model_name
+        slug = self.slugify(utils.crop_slug(self, slug))
+        if current and self._suffix_pattern(slug).fullmatch(current):
+            slug = current
+        setattr(instance, self.name, slug)
+        return slug
+
+    def unique_slug(self, instance, slug, reserved=()):
+        """Return ``slug``, or ``slug`` with the next free numeric suffix.
+
+        ``reserved`` holds slugs that are not in the database yet but are
+        already promised to other unsaved instances.
+        """
+        rivals = self.model._default_manager.filter(
+            **{f"{self.name}__startswith": slug}
+        )
+        if instance.pk:
+            rivals = rivals.exclude(pk=instance.pk)
+        taken = set(rivals.values_list(self.name, flat=True))
+        taken.update(rival for rival in reserved if rival.startswith(slug))
+        if slug not in taken:
+            return slug
+
+        suffix = self._suffix_pattern(slug)
+        index = 1 + max(
+            (int(match[1]) for rival in taken if (match := suffix.fullmatch(rival))),
+            default=1,
+        )
+        tail = f"{self.index_sep}{index}"
+        if len(slug) + len(tail) <= self.max_length:
+            return slug + tail
+
+        # Cropping changes the prefix the query covered; let the stock
+        # field probe the cropped candidates.
+        return utils.generate_unique_slug(self, instance, slug, None)
+
+    def assign_unique_slugs(self, instances):
+        """Give unsaved ``instances`` slugs unique in the table and among themselves.
+
+        One query finds the slugs already taken; only colliding instances pay
+        for a ``unique_slug`` lookup. ``pre_save`` keeps the assigned ``slug-N``
+        values when ``bulk_create`` inserts the rows.
+        """
+        slugs = [self.pre_save(instance, add=True) for instance in instances]
+        taken = set(
+            self.model._default_manager.filter(
+                **{f"{self.name}__in": slugs}
+            ).values_list(self.name, flat=True)
+        )
+        assigned = set()
+        for instance, slug in zip(instances, slugs, strict=True):
+            if slug in taken or slug in assigned:
+                slug = self.unique_slug(instance, slug, reserved=assigned)
+                setattr(instance, self.name, slug)
+            assigned.add(slug)
+
+    def _suffix_pattern(self, slug):
+        return re.compile(rf"{re.escape(slug + self.index_sep)}(\d+)")
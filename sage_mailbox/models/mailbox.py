@@ -1,7 +1,7 @@
-from autoslug import AutoSlugField
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.utils.translation import gettext_lazy as _
 
+from sage_mailbox.models.fields import UniqueAutoSlugField
 from sage_mailbox.models.mixins import TimestampMixin
 from sage_mailbox.utils import map_to_standard_name
 from sage_mailbox.validators import validate_folder_name
@@ -52,7 +52,7 @@ class Mailbox(TimestampMixin):
         choices=StandardMailboxNames.choices,
         default=StandardMailboxNames.CUSTOM,
     )
-    slug = AutoSlugField(
+    slug = UniqueAutoSlugField(
         verbose_name=_("Slug"),
         max_length=255,
         unique=True,
@@ -81,7 +81,18 @@ class Mailbox(TimestampMixin):
         if not self.pk:
             self.folder_type = map_to_standard_name(self.name)
 
-        super().save(*args, **kwargs)
+        # Save optimistically and let the unique index report a slug
+        # collision instead of checking for one before every save.
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except IntegrityError:
+            slug = self._meta.get_field("slug").unique_slug(self, self.slug)
+            if slug == self.slug:
+                raise
+            self.slug = slug
+            with transaction.atomic():
+                super().save(*args, **kwargs)
 
     def __str__(self):
         return str(self.name)
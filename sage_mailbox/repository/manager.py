@@ -13,12 +13,24 @@ class EmailMessageManager(models.Manager):
     def has_attachments(self):
         return self.get_queryset().has_attachments()
 
+    def refresh_attachment_counts(self):
+        return self.get_queryset().refresh_attachment_counts()
+
+    def with_attachment_stats(self):
+        return self.get_queryset().with_attachment_stats()
+
     def select_related_mailbox(self):
         return self.get_queryset().select_related_mailbox()
 
     def list_attachments(self):
         return self.get_queryset().list_attachments()
 
+    def with_full_context(self):
+        return self.get_queryset().with_full_context()
+
+    def for_admin(self, folder_type=None):
+        return self.get_queryset().for_admin(folder_type)
+
     def unread(self):
         return self.get_queryset().unread()
 
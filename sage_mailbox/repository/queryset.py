@@ -1,17 +1,70 @@
 from django.db import models
-from django.db.models import BooleanField, Case, Count, Value, When
-from django.db.models.functions import Length
+from django.db.models import (
+    BooleanField,
+    Case,
+    Count,
+    Exists,
+    OuterRef,
+    Prefetch,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Length
 
 
 class EmailMessageQuerySet(models.QuerySet):
+    def _attachments_of_outer_email(self):
+        attachment_model = self.model._meta.get_field("attachments").related_model
+        return attachment_model.objects.filter(email_message=OuterRef("pk")).order_by()
+
     def total_attachments(self):
-        return self.annotate(total_attachments=Count("attachments__id"))
+        """Annotate ``total_attachments`` with a correlated count subquery.
 
-    def has_attachments(self):
+        Unlike a join with ``GROUP BY``, the subquery keeps one row per email
+        and does not interfere with other annotations.
+        """
         return self.annotate(
+            total_attachments=Coalesce(
+                Subquery(
+                    self._attachments_of_outer_email()
+                    .values("email_message")
+                    .annotate(count=Count("pk"))
+                    .values("count")
+                ),
+                0,
+            )
+        )
+
+    def refresh_attachment_counts(self):
+        """Recount ``attachment_count`` from the stored attachments in one UPDATE.
+
+        Writes that bypass ``Attachment.save()``/``delete()`` (bulk writes,
+        queryset deletes) and rows created before the column existed are
+        brought back in line with this.
+        """
+        return self.update(
+            attachment_count=Coalesce(
+                Subquery(
+                    self._attachments_of_outer_email()
+                    .values("email_message")
+                    .annotate(count=Count("pk"))
+                    .values("count")
+                ),
+                0,
+            )
+        )
+
+    def has_attachments(self):
+        """Annotate ``has_attachments`` with an ``EXISTS`` subquery."""
+        return self.annotate(has_attachments=Exists(self._attachments_of_outer_email()))
+
+    def with_attachment_stats(self):
+        """Annotate ``total_attachments`` and ``has_attachments`` with one join."""
+        return self.annotate(total_attachments=Count("attachments__id")).annotate(
             has_attachments=Case(
-                When(attachments__isnull=False, then=True),
-                default=False,
+                When(total_attachments__gt=0, then=Value(True)),
+                default=Value(False),
                 output_field=BooleanField(),
             )
         )
@@ -22,6 +75,40 @@ class EmailMessageQuerySet(models.QuerySet):
     def list_attachments(self):
         return self.prefetch_related("attachments")
 
+    def with_full_context(self):
+        """Prefetch attachment metadata and flags for ``to_dataclass``.
+
+        Two queries load every email's attachments and flags, instead of two
+        per email. Attachment bytes stay in their files until read.
+        """
+        attachment_model = self.model._meta.get_field("attachments").related_model
+        return self.prefetch_related(
+            Prefetch(
+                "attachments",
+                queryset=attachment_model.objects.only(
+                    "id",
+                    "email_message",
+                    "file",
+                    "filename",
+                    "content_type",
+                    "content_id",
+                    "content_transfer_encoding",
+                ),
+            ),
+            "flags",
+        )
+
+    def for_admin(self, folder_type=None):
+        """Emails with their mailbox joined, optionally limited to one folder.
+
+        Attachment totals come from the denormalized ``attachment_count``
+        column, so no aggregation over attachments is needed.
+        """
+        queryset = self.select_related("mailbox")
+        if folder_type:
+            queryset = queryset.filter(mailbox__folder_type=folder_type)
+        return queryset
+
     def unread(self):
         return self.filter(is_read=False)
 
@@ -1,24 +1,214 @@
+import imaplib
 import logging
+import mimetypes
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from itertools import groupby, islice
+from operator import itemgetter
 
 from dateutil import parser
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
-from django.utils.timezone import make_aware
-from sage_imap.helpers.enums import Flag, MessagePart
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.timezone import make_aware, now
+from sage_imap.exceptions import IMAPMailboxError
+from sage_imap.helpers.enums import Flag, FlagCommand, MessagePart
 from sage_imap.helpers.search import IMAPSearchCriteria
 from sage_imap.models.email import EmailMessage
 from sage_imap.models.message import MessageSet
-from sage_imap.services import IMAPClient, IMAPMailboxService
+from sage_imap.services import IMAPMailboxService, IMAPMailboxUIDService
 
+from sage_mailbox.conf import imap_settings
+from sage_mailbox.imap_pool import imap_pool
 from sage_mailbox.models import Attachment as DjangoAttachment
 from sage_mailbox.models import EmailMessage as DjangoEmailMessage
 from sage_mailbox.models import Flag as DjangoFlag
 from sage_mailbox.models import Mailbox as DjangoMailbox
+from sage_mailbox.models.mailbox import StandardMailboxNames
 from sage_mailbox.utils import sanitize_filename
 
 logger = logging.getLogger(__name__)
 
+# RFC 2683 recommends keeping command lines short; cap UIDs per STORE/MOVE.
+IMAP_UID_BATCH_SIZE = 1000
+# Fetched emails saved per round of bulk queries during a sync.
+SYNC_BATCH_SIZE = 500
+# Caps the ``pk__in`` list of each UPDATE/DELETE below database parameter limits.
+DB_BULK_BATCH_SIZE = 1000
+
+
+def _parse_email_date(value):
+    """Parse an email date, trying the cheap fixed-format parsers first.
+
+    ``sage_imap`` hands dates over in ISO 8601 and raw headers use RFC 2822;
+    ``dateutil`` only parses what neither of them understands.
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(value)
+    except ValueError:
+        return parser.parse(value)
+
+
+def _compress_uids(uids):
+    """Build an RFC 3501 sequence set such as ``1:3,7,9:10`` from integer UIDs."""
+    ranges = []
+    for uid in sorted(set(uids)):
+        if ranges and uid == ranges[-1][1] + 1:
+            ranges[-1][1] = uid
+        else:
+            ranges.append([uid, uid])
+    return ",".join(
+        str(start) if start == end else f"{start}:{end}" for start, end in ranges
+    )
+
+
+def _group_uids_by_mailbox(queryset):
+    """Yield ``(mailbox_name, uids, ids)`` batches for the given emails.
+
+    Emails are grouped by their IMAP folder so each folder is selected once and
+    receives one command per batch of at most ``IMAP_UID_BATCH_SIZE`` UIDs.
+    Only the primary key, UID and folder name are fetched, streamed from the
+    database cursor so a large selection is never cached as a whole. Ordering
+    by folder and UID keeps every batch a compact run of UID ranges.
+    """
+    rows = (
+        queryset.order_by("mailbox_id", "uid")
+        .values_list("id", "uid", "mailbox__name")
+        .iterator(chunk_size=IMAP_UID_BATCH_SIZE)
+    )
+    for mailbox_name, folder_rows in groupby(rows, key=itemgetter(2)):
+        while batch := list(islice(folder_rows, IMAP_UID_BATCH_SIZE)):
+            uids = [uid for _pk, uid, _name in batch]
+            ids = [pk for pk, _uid, _name in batch]
+            yield mailbox_name, uids, ids
+
+
+def _run_per_folder(worker, batches):
+    """Call ``worker(mailbox_name, folder_batches)`` for every folder concurrently.
+
+    Folders are independent, so each one is handled on its own pooled
+    connection. At most ``IMAP_POOL_MAX_CONNECTIONS`` folders run at once to
+    respect the server's connection limit. Returns the worker results in
+    folder order.
+    """
+    folders = [
+        (mailbox_name, list(folder_batches))
+        for mailbox_name, folder_batches in groupby(batches, key=lambda b: b[0])
+    ]
+    if len(folders) <= 1:
+        return [worker(*folder) for folder in folders]
+
+    max_workers = min(imap_settings.IMAP_POOL_MAX_CONNECTIONS, len(folders))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda folder: worker(*folder), folders))
+
+
+def _save_to_storage(files):
+    """Save ``(name, content)`` pairs to the default storage concurrently.
+
+    Uploads to remote storage are independent network round-trips, so up to
+    ``IMAP_ATTACHMENT_UPLOAD_WORKERS`` run at once. Returns the stored names in
+    the order of ``files``.
+    """
+    max_workers = min(imap_settings.IMAP_ATTACHMENT_UPLOAD_WORKERS, len(files))
+    if max_workers <= 1:
+        return [default_storage.save(name, content) for name, content in files]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda file: default_storage.save(*file), files))
+
+
+def _pipelined_uid_store(client, sequence_sets, command, flag):
+    """Send one ``UID STORE`` per sequence set before reading any completion.
+
+    RFC 3501 section 5.5 lets a client issue several commands without waiting
+    for each tagged response. Only STORE inside one already selected folder is
+    pipelined; a SELECT is never sent while commands are in flight. ``imaplib``
+    tracks pending commands by tag, so its ``_command``/``_command_complete``
+    pair is used directly. Returns the status of every command in order; a
+    command the server rejects with ``BAD`` counts as failed while the other
+    responses are still read, so no tag is left pending on the connection. An
+    aborted connection raises, and the pool then discards it.
+    """
+    tags = [
+        client._command("UID", "STORE", sequence_set, command, flag)
+        for sequence_set in sequence_sets
+    ]
+    statuses = []
+    try:
+        for tag in tags:
+            try:
+                statuses.append(client._command_complete("UID", tag)[0])
+            except imaplib.IMAP4.abort:
+                raise
+            except imaplib.IMAP4.error as exc:
+                logger.warning("UID STORE %s failed: %s", tag, exc)
+                statuses.append("BAD")
+    finally:
+        # Every STORE answers with untagged FETCH data that ``uid()`` would
+        # have popped; drop it so it does not accumulate on the connection.
+        client.untagged_responses.pop("FETCH", None)
+    return statuses
+
+
+STANDARD_MAILBOX_CACHE_KEY = "sage_mailbox:standard_mailbox:{}"
+# Bounds how long a rename the receiver below cannot see (a queryset
+# ``update()``, or a process whose cache backend is not shared) goes unnoticed.
+STANDARD_MAILBOX_CACHE_TIMEOUT = 60
+
+
+def _standard_mailbox_name(folder_type):
+    """Return the name of the mailbox with the given standard folder type.
+
+    The name is kept in Django's cache, so with a shared backend every worker
+    sees the invalidation after a mailbox is saved or deleted.
+    """
+    key = STANDARD_MAILBOX_CACHE_KEY.format(folder_type)
+    name = cache.get(key)
+    if name is None:
+        name = DjangoMailbox.objects.only("name").get(folder_type=folder_type).name
+        cache.set(key, name, STANDARD_MAILBOX_CACHE_TIMEOUT)
+    return name
+
+
+@receiver([post_save, post_delete], sender=DjangoMailbox)
+def _clear_standard_mailbox_cache(sender, **kwargs):
+    cache.delete_many(
+        [STANDARD_MAILBOX_CACHE_KEY.format(value) for value in StandardMailboxNames]
+    )
+
+
+def _apply_move(operation, uids, ids):
+    """Run a move ``operation`` on a UID batch once.
+
+    Returns the primary keys of the batch when it succeeded and an empty list
+    when it failed. A move is a COPY, STORE and EXPUNGE, so a failure may come
+    after the messages were already copied; retrying the batch, or halves of
+    it, could copy them a second time. The failed emails are kept and logged.
+    """
+    try:
+        operation(MessageSet(_compress_uids(uids)))
+    except IMAPMailboxError:
+        logger.error(
+            "IMAP move failed for %d emails with UIDs %s.",
+            len(uids),
+            _compress_uids(uids),
+            exc_info=True,
+        )
+        return []
+    return ids
+
 
 # pylint: disable= C0103
 class EmailSyncService:
@@ -26,17 +216,21 @@ class EmailSyncService:
         self.host = host
         self.username = username
         self.password = password
+        # Flag name -> primary key, filled as flags are met during a sync.
+        self._flag_ids = {}
+        # Folder name -> Mailbox, so repeated syncs of a folder skip the lookup.
+        self._mailboxes = {}
 
-    def fetch_and_save_emails(self, folder: str = "INBOX"):
+    def fetch_and_save_emails(self, folder: str = "INBOX", batch_size=None):
+        batch_size = batch_size or imap_settings.IMAP_FETCH_BATCH_SIZE
         try:
-            with IMAPClient(self.host, self.username, self.password) as client:
+            with imap_pool.connection(
+                self.host, self.username, self.password
+            ) as client:
                 with IMAPMailboxService(client) as mailbox:
                     mailbox.select(folder)
 
-                    # Retrieve mailbox object or create a new one if it doesn't exist
-                    mailbox_obj, _ = DjangoMailbox.objects.get_or_create(
-                        name__contains=folder
-                    )
+                    mailbox_obj = self._get_mailbox(folder)
 
                     # Get the latest email date from the database
                     latest_email = (
@@ -53,30 +247,46 @@ class EmailSyncService:
                     else:
                         criteria = IMAPSearchCriteria.ALL
 
-                    # Fetch emails based on the criteria
-                    msg_ids = mailbox.search(criteria)
-                    if msg_ids:
-                        emails = mailbox.fetch(
-                            MessageSet(msg_ids), MessagePart.BODY_PEEK
-                        )
-                        result = self.save_emails_to_db(emails, mailbox_obj)
-                        return result
-
-            return {"created_emails": 0, "created_attachments": 0}
+                    # Fetch and save the matching emails one batch at a time, so
+                    # FETCH command lines stay short and only one batch of
+                    # messages is held in memory.
+                    msg_ids = iter(mailbox.search(criteria))
+                    result = {"created_emails": 0, "created_attachments": 0}
+                    while batch := list(islice(msg_ids, batch_size)):
+                        emails = mailbox.fetch(MessageSet(batch), MessagePart.BODY_PEEK)
+                        saved = self.save_emails_to_db(emails, mailbox_obj)
+                        result["created_emails"] += saved["created_emails"]
+                        result["created_attachments"] += saved["created_attachments"]
+                    return result
         except Exception as exc:
-            logger.error(f"Error fetching and saving emails: {exc}")
+            logger.error("Error fetching and saving emails: %s", exc)
             return {"created_emails": 0, "created_attachments": 0}
 
-    def save_emails_to_db(self, emails, mailbox):
+    def _get_mailbox(self, folder):
+        """Return the ``Mailbox`` named ``folder``, creating it if it is missing."""
+        if folder not in self._mailboxes:
+            # An exact match uses the unique index on ``name``.
+            self._mailboxes[folder], _ = DjangoMailbox.objects.get_or_create(
+                name=folder
+            )
+        return self._mailboxes[folder]
+
+    def save_emails_to_db(self, emails, mailbox, batch_size=SYNC_BATCH_SIZE):
+        """Save fetched emails in batches of ``batch_size`` with bulk queries.
+
+        Each batch costs a fixed number of queries (look up existing emails,
+        bulk create/update emails, attachments and flag links) instead of
+        several queries per email.
+        """
         created_emails_count = 0
         created_attachments_count = 0
 
-        for email in emails:
-            created_email, created_attachments = self.create_or_update_email(
-                email, mailbox
+        emails = list(emails)
+        for start in range(0, len(emails), batch_size):
+            created_emails, created_attachments = self._save_email_batch(
+                emails[start : start + batch_size], mailbox
             )
-            if created_email:
-                created_emails_count += 1
+            created_emails_count += created_emails
             created_attachments_count += created_attachments
 
         return {
@@ -85,14 +295,36 @@ class EmailSyncService:
         }
 
     def create_or_update_email(self, email: EmailMessage, mailbox):
+        created_emails, created_attachments = self._save_email_batch([email], mailbox)
+        return bool(created_emails), created_attachments
+
+    _email_field_names = (
+        "message_id",
+        "subject",
+        "from_address",
+        "to_address",
+        "cc_address",
+        "bcc_address",
+        "date",
+        "raw",
+        "plain_body",
+        "html_body",
+        "size",
+        "is_read",
+        "is_flagged",
+        "headers",
+        "mailbox",
+    )
+
+    @staticmethod
+    def _email_fields(email: EmailMessage, mailbox):
         # Determine if the email is read and flagged based on the flags
         is_read = Flag.SEEN in email.flags
         is_flagged = Flag.FLAGGED in email.flags
 
-        # Create or update the EmailMessage
         try:
             # Parse the date string to a datetime object
-            date_obj = parser.parse(email.date) if email.date else None
+            date_obj = _parse_email_date(email.date) if email.date else None
 
             # Make the datetime object timezone-aware
             aware_date = (
@@ -104,63 +336,491 @@ class EmailSyncService:
         except (ValueError, TypeError, ValidationError):
             aware_date = None
 
-        django_email, created = DjangoEmailMessage.objects.update_or_create(
-            uid=email.uid,
-            defaults={
-                "message_id": email.message_id,
-                "subject": email.subject,
-                "from_address": email.from_address,
-                "to_address": email.to_address,
-                "cc_address": email.cc_address,
-                "bcc_address": email.bcc_address,
-                "date": aware_date,
-                "raw": email.raw,
-                "plain_body": email.plain_body,
-                "html_body": email.html_body,
-                "size": email.size,
-                "is_read": is_read,
-                "is_flagged": is_flagged,
-                "headers": email.headers,
-                "mailbox": mailbox,
-            },
-        )
-
-        # Handle attachments
-        created_attachments_count = self.handle_attachments(
-            django_email, email.attachments
-        )
-
-        # Handle flags
-        self.handle_flags(django_email, email.flags)
-
-        return created, created_attachments_count
+        return {
+            "message_id": email.message_id,
+            "subject": email.subject,
+            "from_address": email.from_address,
+            "to_address": email.to_address,
+            "cc_address": email.cc_address,
+            "bcc_address": email.bcc_address,
+            "date": aware_date,
+            "raw": email.raw,
+            "plain_body": email.plain_body,
+            "html_body": email.html_body,
+            "size": email.size,
+            "is_read": is_read,
+            "is_flagged": is_flagged,
+            "headers": email.headers,
+            "mailbox": mailbox,
+        }
 
-    def handle_attachments(self, django_email, attachments):
-        created_attachments_count = 0
+    @transaction.atomic
+    def _save_email_batch(self, emails, mailbox):
+        uids = [email.uid for email in emails if email.uid is not None]
+        existing = {}
+        for django_email in DjangoEmailMessage.objects.filter(
+            mailbox=mailbox, uid__in=uids
+        ).only("id", "uid"):
+            existing[django_email.uid] = django_email
+
+        # Pair every fetched email with its model instance; a UID fetched twice
+        # updates the same row, as update_or_create would.
+        pairs = []
+        emails_to_create = []
+        emails_to_update = {}
+        modified_at = now()
+        for email in emails:
+            django_email = existing.get(email.uid)
+            if django_email is None:
+                django_email = DjangoEmailMessage(uid=email.uid)
+                emails_to_create.append(django_email)
+                if email.uid is not None:
+                    existing[email.uid] = django_email
+            elif django_email.pk is not None:
+                django_email.modified_at = modified_at
+                emails_to_update[django_email.pk] = django_email
+            for field, value in self._email_fields(email, mailbox).items():
+                setattr(django_email, field, value)
+            pairs.append((django_email, email))
 
-        for attachment in attachments:
-            file_content = ContentFile(attachment.payload)
-            sanitized_filename = sanitize_filename(attachment.filename)
-            file_name = default_storage.save(
-                f"attachments/{sanitized_filename}", file_content
+        DjangoEmailMessage.objects.bulk_create(emails_to_create)
+        if any(django_email.pk is None for django_email in emails_to_create):
+            # Backends without RETURNING (MySQL) do not set primary keys.
+            pks = dict(
+                DjangoEmailMessage.objects.filter(
+                    mailbox=mailbox,
+                    uid__in=[django_email.uid for django_email in emails_to_create],
+                ).values_list("uid", "id")
             )
+            for django_email in emails_to_create:
+                django_email.pk = pks.get(django_email.uid)
+        DjangoEmailMessage.objects.bulk_update(
+            emails_to_update.values(),
+            [*self._email_field_names, "modified_at"],
+            batch_size=DB_BULK_BATCH_SIZE,
+        )
 
-            DjangoAttachment.objects.update_or_create(
-                email_message=django_email,
-                filename=sanitized_filename,
-                defaults={
-                    "file": file_name,
-                    "content_type": attachment.content_type,
-                    "content_id": attachment.content_id,
-                    "content_transfer_encoding": attachment.content_transfer_encoding,
-                },
+        created_attachments_count = self._save_batch_attachments(
+            [(django_email, email.attachments) for django_email, email in pairs]
+        )
+        self._save_batch_flags(
+            [(django_email, email.flags) for django_email, email in pairs]
+        )
+        return len(emails_to_create), created_attachments_count
+
+    @staticmethod
+    def _save_batch_attachments(pairs):
+        email_ids = {django_email.pk for django_email, _attachments in pairs}
+        existing = {
+            (attachment.email_message_id, attachment.filename): attachment
+            for attachment in DjangoAttachment.objects.filter(
+                email_message_id__in=email_ids
+            ).only("id", "email_message_id", "filename")
+        }
+
+        files = [
+            (django_email, attachment, sanitize_filename(attachment.filename))
+            for django_email, attachments in pairs
+            for attachment in attachments
+        ]
+        file_names = _save_to_storage(
+            [
+                (f"attachments/{sanitized_filename}", ContentFile(attachment.payload))
+                for _email, attachment, sanitized_filename in files
+            ]
+        )
+
+        attachments_to_create = []
+        attachments_to_update = {}
+        created_attachments_count = 0
+        for (django_email, attachment, sanitized_filename), file_name in zip(
+            files, file_names, strict=True
+        ):
+            key = (django_email.pk, sanitized_filename)
+            django_attachment = existing.get(key)
+            if django_attachment is None:
+                django_attachment = DjangoAttachment(
+                    email_message_id=django_email.pk, filename=sanitized_filename
+                )
+                existing[key] = django_attachment
+                attachments_to_create.append(django_attachment)
+            elif django_attachment.pk is not None:
+                attachments_to_update[django_attachment.pk] = django_attachment
+            django_attachment.file = file_name
+            django_attachment.content_type = (
+                attachment.content_type or mimetypes.guess_type(file_name)[0]
+            )
+            django_attachment.content_id = attachment.content_id
+            django_attachment.content_transfer_encoding = (
+                attachment.content_transfer_encoding
             )
             created_attachments_count += 1
 
+        DjangoAttachment.objects.bulk_create(attachments_to_create)
+        DjangoAttachment.objects.bulk_update(
+            attachments_to_update.values(),
+            ["file", "content_type", "content_id", "content_transfer_encoding"],
+            batch_size=DB_BULK_BATCH_SIZE,
+        )
+        # Bulk writes skip the attachment signals, so refresh the counts here.
+        DjangoEmailMessage.objects.filter(pk__in=email_ids).refresh_attachment_counts()
         return created_attachments_count
 
+    def _get_flag_ids(self, names):
+        """Return ``{name: pk}`` for ``names``, creating the missing flags."""
+        missing = set(names) - self._flag_ids.keys()
+        if missing:
+            self._cache_flag_ids(missing)
+            missing -= self._flag_ids.keys()
+        if missing:
+            DjangoFlag.objects.bulk_create([DjangoFlag(name=name) for name in missing])
+            self._cache_flag_ids(missing)
+        return {name: self._flag_ids[name] for name in names}
+
+    def _cache_flag_ids(self, names):
+        flags = DjangoFlag.objects.filter(name__in=names).values_list("name", "id")
+        for name, flag_id in flags:
+            self._flag_ids.setdefault(name, flag_id)
+
+    def _save_batch_flags(self, pairs):
+        """Link each email to its flags, writing only the links that changed."""
+        names_by_email = {
+            django_email.pk: {getattr(flag, "value", flag) for flag in flags}
+            for django_email, flags in pairs
+        }
+        flag_ids = self._get_flag_ids(set().union(*names_by_email.values()))
+        desired = {
+            (email_id, flag_ids[name])
+            for email_id, names in names_by_email.items()
+            for name in names
+        }
+
+        through = DjangoEmailMessage.flags.through
+        current = {
+            (email_id, flag_id): link_id
+            for link_id, email_id, flag_id in through.objects.filter(
+                emailmessage_id__in=names_by_email.keys()
+            ).values_list("id", "emailmessage_id", "flag_id")
+        }
+        stale = [link_id for link, link_id in current.items() if link not in desired]
+        if stale:
+            through.objects.filter(pk__in=stale).delete()
+        through.objects.bulk_create(
+            [
+                through(emailmessage_id=email_id, flag_id=flag_id)
+                for email_id, flag_id in desired - current.keys()
+            ]
+        )
+
+    def handle_attachments(self, django_email, attachments):
+        return self._save_batch_attachments([(django_email, attachments)])
+
     def handle_flags(self, django_email, flags):
-        django_email.flags.clear()
-        for flag in flags:
-            flag_instance, created = DjangoFlag.objects.get_or_create(name=flag)
-            django_email.flags.add(flag_instance)
+        self._save_batch_flags([(django_email, flags)])
+
+
+class EmailActionService:
+    """Apply the email admin actions to the IMAP server and the database.
+
+    Every method takes a queryset of ``EmailMessage`` objects and returns the
+    number of emails that were changed, so it can run either inside an admin
+    request or from a background task. Connections come from the shared
+    ``imap_pool`` instead of a fresh login per action.
+    """
+
+    def __init__(self, host: str, username: str, password: str):
+        self.host = host
+        self.username = username
+        self.password = password
+
+    def mark_as_read(self, queryset):
+        return self._store_flag(
+            queryset,
+            {"is_read": False},
+            FlagCommand.ADD,
+            Flag.SEEN,
+            "is_read",
+            True,
+        )
+
+    def mark_as_unread(self, queryset):
+        return self._store_flag(
+            queryset,
+            {"is_read": True},
+            FlagCommand.REMOVE,
+            Flag.SEEN,
+            "is_read",
+            False,
+        )
+
+    def mark_as_flagged(self, queryset):
+        return self._store_flag(
+            queryset,
+            {"is_flagged": False},
+            FlagCommand.ADD,
+            Flag.FLAGGED,
+            "is_flagged",
+            True,
+        )
+
+    def mark_as_unflagged(self, queryset):
+        return self._store_flag(
+            queryset,
+            {"is_flagged": True},
+            FlagCommand.REMOVE,
+            Flag.FLAGGED,
+            "is_flagged",
+            False,
+        )
+
+    def move_to_trash(self, queryset):
+        trash_name = _standard_mailbox_name(StandardMailboxNames.TRASH)
+        results = _run_per_folder(
+            lambda mailbox_name, folder_batches: self._trash_folder(
+                mailbox_name, folder_batches, trash_name
+            ),
+            _group_uids_by_mailbox(queryset),
+        )
+
+        ids_to_delete = [pk for moved, _partial in results for pk in moved]
+        partial = any(folder_partial for _moved, folder_partial in results)
+        self._delete_emails(queryset, ids_to_delete, partial)
+        logger.debug("Deleted moved email messages from the database.")
+        return len(ids_to_delete)
+
+    def _trash_folder(self, mailbox_name, folder_batches, trash_name):
+        moved = []
+        partial = False
+
+        with imap_pool.connection(self.host, self.username, self.password) as client:
+            mailbox_service = IMAPMailboxUIDService(client)
+            mailbox_service.select(mailbox_name)
+            for _mailbox_name, uids, ids in folder_batches:
+                processed = _apply_move(
+                    lambda msg_set: mailbox_service.uid_trash(msg_set, trash_name),
+                    uids,
+                    ids,
+                )
+                moved.extend(processed)
+                partial = partial or len(processed) < len(ids)
+
+        logger.debug("Moved %d emails from %s to trash.", len(moved), mailbox_name)
+        return moved, partial
+
+    def restore_from_trash(self, queryset):
+        ids_to_restore = []
+        partial = False
+
+        with imap_pool.connection(self.host, self.username, self.password) as client:
+            mailbox_service = IMAPMailboxUIDService(client)
+            trash_name = _standard_mailbox_name(StandardMailboxNames.TRASH)
+            inbox_name = _standard_mailbox_name(StandardMailboxNames.INBOX)
+
+            mailbox_service.select(trash_name)
+            for _mailbox_name, uids, ids in _group_uids_by_mailbox(queryset):
+                restored = _apply_move(
+                    lambda msg_set: mailbox_service.uid_restore(
+                        msg_set, trash_name, inbox_name
+                    ),
+                    uids,
+                    ids,
+                )
+                ids_to_restore.extend(restored)
+                partial = partial or len(restored) < len(ids)
+                logger.debug("Restored %d emails to inbox.", len(restored))
+
+        self._delete_emails(queryset, ids_to_restore, partial)
+        logger.debug("Deleted restored email messages from the database.")
+        return len(ids_to_restore)
+
+    def clear_trash(self):
+        """Permanently delete every email in the Trash folder and the database."""
+        trash_name = _standard_mailbox_name(StandardMailboxNames.TRASH)
+
+        with imap_pool.connection(self.host, self.username, self.password) as client:
+            mailbox_service = IMAPMailboxUIDService(client)
+            mailbox_service.select(trash_name)
+            uids = [
+                int(uid)
+                for uid in mailbox_service.uid_search(
+                    IMAPSearchCriteria.ALL, charset=None
+                )
+            ]
+            # Bounded batches keep each command line and server-side expunge small.
+            for start in range(0, len(uids), IMAP_UID_BATCH_SIZE):
+                msg_set = MessageSet(
+                    _compress_uids(uids[start : start + IMAP_UID_BATCH_SIZE])
+                )
+                client.uid("STORE", msg_set.msg_ids, FlagCommand.ADD, Flag.DELETED)
+                mailbox_service.uid_delete(msg_set, trash_name)
+            logger.debug(
+                "Permanently deleted %d emails from %s.", len(uids), trash_name
+            )
+
+        deleted = self._raw_delete_emails(
+            DjangoEmailMessage.objects.filter(
+                mailbox__folder_type=StandardMailboxNames.TRASH
+            )
+        )
+        logger.debug("Permanently deleted email messages from the database.")
+        return deleted
+
+    @staticmethod
+    def _raw_delete_emails(queryset):
+        """Delete emails with one statement per table, bypassing the collector.
+
+        Attachment rows and flag links are removed explicitly first, since
+        ``_raw_delete`` neither cascades nor sends delete signals. Attachment
+        files on disk are left alone, as with a regular ``delete()``.
+        """
+        using = queryset.db
+        email_ids = queryset.values("pk")
+        flag_links = DjangoEmailMessage.flags.through.objects.filter(
+            emailmessage_id__in=email_ids
+        )
+        with transaction.atomic(using=using):
+            DjangoAttachment.objects.filter(email_message_id__in=email_ids)._raw_delete(
+                using
+            )
+            flag_links._raw_delete(using)
+            return queryset._raw_delete(using)
+
+    @staticmethod
+    def _delete_emails(queryset, ids, partial):
+        """Delete the processed emails, reusing the selection when none failed.
+
+        The regular ``delete()`` is kept (rather than ``_raw_delete``) because
+        attachments and flag links must still be cascaded.
+        """
+        if partial:
+            queryset = queryset.model.objects.filter(pk__in=ids)
+        with transaction.atomic():
+            queryset.delete()
+
+    def _store_flag(self, queryset, filters, command, flag, field, value):
+        results = _run_per_folder(
+            lambda mailbox_name, folder_batches: self._store_folder_flag(
+                mailbox_name, folder_batches, command, flag
+            ),
+            _group_uids_by_mailbox(queryset.filter(**filters)),
+        )
+        ids_to_update = [pk for ids in results for pk in ids]
+
+        # Only the database writes run in a transaction, never the IMAP round-trips.
+        with transaction.atomic():
+            for start in range(0, len(ids_to_update), DB_BULK_BATCH_SIZE):
+                queryset.model.objects.filter(
+                    pk__in=ids_to_update[start : start + DB_BULK_BATCH_SIZE]
+                ).update(**{field: value})
+        logger.debug("Updated %s on email messages in the database.", field)
+        return len(ids_to_update)
+
+    def _store_folder_flag(self, mailbox_name, folder_batches, command, flag):
+        stored = []
+
+        with imap_pool.connection(self.host, self.username, self.password) as client:
+            IMAPMailboxUIDService(client).select(mailbox_name)
+            sequence_sets = [_compress_uids(uids) for _, uids, _ in folder_batches]
+            if len(sequence_sets) == 1:
+                statuses = [client.uid("STORE", sequence_sets[0], command, flag)[0]]
+            else:
+                statuses = _pipelined_uid_store(client, sequence_sets, command, flag)
+
+        # Other folders may already be stored, so a failed batch is logged and
+        # left out of the database update instead of aborting the whole action.
+        for status, (_, uids, ids) in zip(statuses, folder_batches, strict=True):
+            if status != "OK":
+                logger.error(
+                    "Failed to %s %s on UIDs %s in %s.",
+                    command,
+                    flag,
+                    uids,
+                    mailbox_name,
+                )
+                continue
+            stored.extend(ids)
+
+        logger.debug(
+            "Stored %s %s on %d emails in %s.", command, flag, len(stored), mailbox_name
+        )
+        return stored
+
+
+class SeenFlagBatcher:
+    """Coalesce mark-as-read requests into one ``UID STORE`` per folder.
+
+    Emails opened in the admin within ``delay`` seconds of each other are
+    flagged ``\\Seen`` together on a single pooled connection when a timer
+    fires, and then marked read in the database with one UPDATE.
+
+    Parameters
+    ----------
+    host : str
+        IMAP server host.
+    username : str
+        IMAP account username.
+    password : str
+        IMAP account password.
+    delay : float
+        Seconds to wait for more emails before flushing the batch.
+    """
+
+    def __init__(self, host, username, password, delay):
+        self.host = host
+        self.username = username
+        self.password = password
+        self.delay = delay
+        self._pending = defaultdict(dict)
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def add(self, mailbox_name, uid, pk):
+        """Queue the email with ``uid`` in ``mailbox_name`` to be marked as read."""
+        with self._lock:
+            self._pending[mailbox_name][uid] = pk
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Send the queued STORE commands and mark the stored emails as read."""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(dict)
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending:
+            return
+
+        ids_to_update = []
+        try:
+            with imap_pool.connection(
+                self.host, self.username, self.password
+            ) as client:
+                mailbox_service = IMAPMailboxUIDService(client)
+                for mailbox_name, emails in pending.items():
+                    mailbox_service.select(mailbox_name)
+                    status, _data = client.uid(
+                        "STORE", _compress_uids(emails), FlagCommand.ADD, Flag.SEEN
+                    )
+                    if status != "OK":
+                        logger.error(
+                            "Failed to mark UIDs %s in %s as seen.",
+                            list(emails),
+                            mailbox_name,
+                        )
+                        continue
+                    ids_to_update.extend(emails.values())
+
+            DjangoEmailMessage.objects.filter(pk__in=ids_to_update).update(is_read=True)
+            logger.debug("Marked %d opened emails as read.", len(ids_to_update))
+        except Exception:
+            logger.error("Error marking opened emails as read.", exc_info=True)
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            # The timer thread opened its own database connection.
+            connections.close_all()
@@ -1,32 +1,53 @@
-import email
 import logging
 import mimetypes
+import os
 from email.utils import make_msgid
+from functools import lru_cache
 
-from django.conf import settings
 from django.contrib.sites.models import Site
 from django.core.mail import EmailMultiAlternatives
 from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils.timezone import now
-from sage_imap.services import IMAPClient, IMAPMailboxService
+from sage_imap.services import IMAPMailboxService
 
+from sage_mailbox.conf import imap_settings
+from sage_mailbox.imap_pool import imap_pool
 from sage_mailbox.models import EmailMessage, Sent
-from sage_mailbox.models.mailbox import Mailbox, StandardMailboxNames
+from sage_mailbox.models.mailbox import StandardMailboxNames
+from sage_mailbox.repository.service import _standard_mailbox_name
+from sage_mailbox.utils import imap_credentials
 
 logger = logging.getLogger(__name__)
 
 # pylint: disable=W0613, C0103
 
 
-@receiver(post_save, sender=EmailMessage)
+@lru_cache(maxsize=512)
+def _guess_mime_type(extension):
+    """Return the MIME type for a file extension such as ``.pdf``."""
+    mime_type, _ = mimetypes.guess_type(f"attachment{extension}")
+    # Default to binary stream if MIME type can't be guessed
+    return mime_type or "application/octet-stream"
+
+
+@receiver(post_save, sender=EmailMessage, dispatch_uid="send_email_EmailMessage")
 def send_email_after_save(sender, instance, created, **kwargs):
-    if created:
+    # An email saved with its raw message was fetched from the server (e.g.
+    # through ``EmailMessage.from_dataclass``), not composed to be sent.
+    if not created or instance.raw:
+        return
+    if imap_settings.IMAP_ASYNC_ACTIONS_ENABLED:
+        from sage_mailbox.tasks import send_email_task
+
+        transaction.on_commit(lambda: send_email_task.delay(instance.pk))
+    else:
         transaction.on_commit(lambda: send_email(instance))
 
 
 def send_email(email_message):
+    # Served from the sites framework's per-process cache once SITE_ID is set.
     current_site = Site.objects.get_current()
     # Generate a Message-ID if not present
     if not email_message.message_id:
@@ -56,19 +77,20 @@ def send_email(email_message):
     if email_message.html_body:
         msg.attach_alternative(email_message.html_body, "text/html")
 
-    # Attach any files
-    for attachment in email_message.attachments.all():
-        file_content = attachment.file.read()
-        mime_type, _ = mimetypes.guess_type(attachment.filename)
-        if not mime_type:
-            # Default to binary stream if MIME type can't be guessed
-            mime_type = "application/octet-stream"
+    # Attach any files; reuses prefetched attachments when the caller has them.
+    attachments = list(email_message.attachments.all())
+    for attachment in attachments:
+        # Read in chunks through a handle that is closed again, rather than
+        # leaving the storage file open after a single unbounded read().
+        with attachment.file.open("rb") as attachment_file:
+            file_content = b"".join(attachment_file.chunks())
+        mime_type = _guess_mime_type(os.path.splitext(attachment.filename)[1].lower())
         msg.attach(attachment.filename, file_content, mime_type)
 
     # Additional headers
     msg.extra_headers = {
         "Message-ID": email_message.message_id,
-        "X-MS-Has-Attach": "yes" if email_message.has_attachments() else "no",
+        "X-MS-Has-Attach": "yes" if attachments else "no",
         "X-Priority": "3",
         "X-Auto-Response-Suppress": "All",
         "MIME-Version": "1.0",
@@ -78,34 +100,33 @@ def send_email(email_message):
     # Send the email
     msg.send()
 
-    # Save raw email to IMAP Sent folder and get raw email data
-    raw_email = msg.message().as_string()
-    email_message.raw = raw_email.encode("utf-8")  # Ensure raw email is bytes
-
-    host = settings.IMAP_SERVER_DOMAIN
-    username = settings.IMAP_SERVER_USER
-    password = settings.IMAP_SERVER_PASSWORD
+    # Serialize straight to bytes; the headers are read from the same MIME
+    # object below instead of parsing the raw bytes back.
+    mime_message = msg.message()
+    email_message.raw = mime_message.as_bytes()
 
-    with IMAPClient(host, username, password) as client:
+    with imap_pool.connection(*imap_credentials()) as client:
         with IMAPMailboxService(client) as mailbox:
-            folder = Mailbox.objects.get(folder_type=StandardMailboxNames.SENT)
-            mailbox.select(folder.name)
-            mailbox.save_sent(email_message.raw, folder.name)  # Send raw email as bytes
+            folder_name = _standard_mailbox_name(StandardMailboxNames.SENT)
+            mailbox.select(folder_name)
+            mailbox.save_sent(email_message.raw, folder_name)  # Send raw email as bytes
 
     # Save headers to email_message
-    parsed_email = email.message_from_bytes(email_message.raw)
-    headers = {k: v for k, v in parsed_email.items()}
-    email_message.headers = headers
+    email_message.headers = {k: str(v) for k, v in mime_message.items()}
 
     # Calculate and save email size
     email_message.size = len(email_message.raw)
 
-    # Save email message with updated fields
-    email_message.save()
+    # Save only the fields filled in while sending
+    email_message.save(
+        update_fields=["message_id", "date", "raw", "headers", "size", "modified_at"]
+    )
 
 
-# Connect the signal to all proxies
-proxy_models = [EmailMessage, Sent]
+# Connect the signal to the proxies; EmailMessage is connected above
+proxy_models = [Sent]
 
 for model in proxy_models:
-    post_save.connect(send_email_after_save, sender=model)
+    post_save.connect(
+        send_email_after_save, sender=model, dispatch_uid=f"send_email_{model.__name__}"
+    )
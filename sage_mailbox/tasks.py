@@ -0,0 +1,133 @@
+"""Celery tasks for running email admin actions and syncs in the background.
+
+This module is only imported when ``IMAP_ASYNC_ACTIONS_ENABLED`` is set, so
+Celery stays an optional dependency.
+"""
+
+import logging
+
+from celery import shared_task
+from django.core.cache import cache
+from django.utils.timezone import now
+
+from sage_mailbox.models import EmailMessage, Mailbox
+from sage_mailbox.repository.service import EmailActionService, EmailSyncService
+from sage_mailbox.signals.email import send_email
+from sage_mailbox.utils import imap_credentials
+
+logger = logging.getLogger(__name__)
+
+# Set while a sync of the folder type is queued or running, so overlapping
+# "Sync Emails" clicks collapse into one task.
+SYNC_PENDING_CACHE_KEY = "sage_mailbox:sync_pending:{}"
+SYNC_PENDING_TIMEOUT = 60 * 60
+# Outcome of the last finished sync of the folder type, shown in the admin.
+LAST_SYNC_CACHE_KEY = "sage_mailbox:last_sync:{}"
+
+
+def _run_action(action, ids, user_id):
+    service = EmailActionService(*imap_credentials())
+    updated = getattr(service, action)(EmailMessage.objects.filter(id__in=ids))
+    logger.info(
+        "Finished %s requested by user %s: %d of %d emails updated.",
+        action,
+        user_id,
+        updated,
+        len(ids),
+    )
+    return updated
+
+
+@shared_task
+def move_to_trash_task(ids, user_id=None):
+    return _run_action("move_to_trash", ids, user_id)
+
+
+@shared_task
+def mark_as_read_task(ids, user_id=None):
+    return _run_action("mark_as_read", ids, user_id)
+
+
+@shared_task
+def mark_as_unread_task(ids, user_id=None):
+    return _run_action("mark_as_unread", ids, user_id)
+
+
+@shared_task
+def mark_as_flagged_task(ids, user_id=None):
+    return _run_action("mark_as_flagged", ids, user_id)
+
+
+@shared_task
+def mark_as_unflagged_task(ids, user_id=None):
+    return _run_action("mark_as_unflagged", ids, user_id)
+
+
+@shared_task
+def restore_from_trash_task(ids, user_id=None):
+    return _run_action("restore_from_trash", ids, user_id)
+
+
+@shared_task
+def send_email_task(email_id):
+    """Send a newly saved email and store it in the Sent folder.
+
+    ``send_email`` stores the raw message once it is sent, so a retried or
+    duplicated task does not send the email twice.
+    """
+    email_message = EmailMessage.objects.prefetch_related("attachments").get(
+        pk=email_id
+    )
+    if email_message.raw:
+        logger.info("Email %s was already sent; not sending it again.", email_id)
+        return False
+    send_email(email_message)
+    return True
+
+
+def queue_sync_emails(folder_type, user_id=None):
+    """Queue a sync of the folder type unless one is already pending.
+
+    Returns the queued task result, or ``None`` when a sync is still pending.
+    """
+    if not cache.add(
+        SYNC_PENDING_CACHE_KEY.format(folder_type), True, SYNC_PENDING_TIMEOUT
+    ):
+        return None
+    return sync_emails_task.delay(folder_type, user_id)
+
+
+@shared_task
+def sync_emails_task(folder_type, user_id=None):
+    try:
+        mailbox = Mailbox.objects.only("name").get(folder_type=folder_type)
+        result = EmailSyncService(*imap_credentials()).fetch_and_save_emails(
+            mailbox.name
+        )
+    finally:
+        cache.delete(SYNC_PENDING_CACHE_KEY.format(folder_type))
+    cache.set(
+        LAST_SYNC_CACHE_KEY.format(folder_type),
+        {**result, "finished_at": now()},
+        None,
+    )
+    logger.info(
+        "Finished syncing %s requested by user %s: %d emails and %d attachments "
+        "created.",
+        mailbox.name,
+        user_id,
+        result.get("created_emails", 0),
+        result.get("created_attachments", 0),
+    )
+    return result
+
+
+@shared_task
+def clear_trash_task(user_id=None):
+    deleted = EmailActionService(*imap_credentials()).clear_trash()
+    logger.info(
+        "Finished clearing trash requested by user %s: %d emails deleted.",
+        user_id,
+        deleted,
+    )
+    return deleted
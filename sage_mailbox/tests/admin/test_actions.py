@@ -0,0 +1,42 @@
+import zipfile
+from io import BytesIO
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from sage_mailbox.admin.actions.email import _stream_eml, _stream_eml_zip
+
+
+class TestStreamEml:
+
+    def test_stream_eml_yields_slices(self):
+        raw = b"x" * 2500
+
+        with patch("sage_mailbox.admin.actions.email.ZIP_STREAM_CHUNK_SIZE", 1024):
+            chunks = list(_stream_eml(raw))
+
+        assert [len(chunk) for chunk in chunks] == [1024, 1024, 452]
+        assert b"".join(chunks) == raw
+
+
+class TestStreamEmlZip:
+
+    def test_stream_eml_zip(self):
+        emails = [
+            SimpleNamespace(uid=1, raw=b"Subject: one\r\n\r\nbody"),
+            SimpleNamespace(uid=2, raw=b"Subject: two\r\n\r\nbody"),
+        ]
+        data = b"".join(_stream_eml_zip(emails))
+
+        with zipfile.ZipFile(BytesIO(data)) as zip_file:
+            assert zip_file.namelist() == ["1.eml", "2.eml"]
+            assert zip_file.read("2.eml") == b"Subject: two\r\n\r\nbody"
+
+    def test_stream_eml_zip_writes_large_messages_in_chunks(self):
+        raw = b"Subject: big\r\n\r\n" + bytes(range(256)) * 64
+        emails = [SimpleNamespace(uid=7, raw=raw)]
+
+        with patch("sage_mailbox.admin.actions.email.ZIP_STREAM_CHUNK_SIZE", 1024):
+            data = b"".join(_stream_eml_zip(emails))
+
+        with zipfile.ZipFile(BytesIO(data)) as zip_file:
+            assert zip_file.read("7.eml") == raw
@@ -0,0 +1,132 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.contrib import admin
+from django.contrib.auth.models import Permission, User
+from django.test import RequestFactory
+from django.utils import timezone
+from model_bakery import baker
+
+from sage_mailbox.admin.email import AttachmentInline, EmailMessageAdmin, TrashAdmin
+from sage_mailbox.models import EmailMessage, Mailbox, Trash
+
+
+@pytest.mark.django_db
+class TestEmailMessageAdmin:
+
+    @pytest.fixture
+    def request_(self):
+        request = RequestFactory().get("/admin/sage_mailbox/emailmessage/")
+        request.user = User.objects.create_superuser("admin", "admin@example.com")
+        return request
+
+    def test_changelist_defers_body_columns(self, request_):
+        model_admin = EmailMessageAdmin(EmailMessage, admin.site)
+        changelist = model_admin.get_changelist_instance(request_)
+
+        deferred, defer = changelist.queryset.query.deferred_loading
+        assert defer is True
+        assert {"raw", "plain_body", "html_body", "headers"} <= set(deferred)
+
+    def test_folder_admin_lists_only_its_folder(self, request_):
+        inbox = baker.make(Mailbox, name="INBOX", slug="inbox", folder_type="INBOX")
+        trash = baker.make(Mailbox, name="Trash", slug="trash", folder_type="TRASH")
+        baker.make(EmailMessage, mailbox=inbox)
+        trashed = baker.make(EmailMessage, mailbox=trash)
+
+        queryset = TrashAdmin(Trash, admin.site).get_queryset(request_)
+
+        assert list(queryset.values_list("id", flat=True)) == [trashed.id]
+
+    def test_changelist_annotates_is_recent_when_listed(self, request_):
+        inbox = baker.make(Mailbox, name="INBOX", slug="inbox")
+        baker.make(EmailMessage, mailbox=inbox)
+        model_admin = EmailMessageAdmin(EmailMessage, admin.site)
+        model_admin.list_display = (*model_admin.list_display, "is_recent")
+
+        changelist = model_admin.get_changelist_instance(request_)
+
+        assert model_admin.is_recent(changelist.queryset.get()) is True
+
+    def test_actions_follow_user_permissions(self, request_):
+        request_.user = User.objects.create_user("staff", is_staff=True)
+        request_.user.user_permissions.add(Permission.objects.get(codename="mark_read"))
+        model_admin = EmailMessageAdmin(EmailMessage, admin.site)
+
+        actions = model_admin.get_actions(request_)
+
+        assert "mark_as_read" in actions
+        assert "mark_as_flagged" not in actions
+        assert "download_as_eml" not in actions
+
+    def test_get_object_is_loaded_once_per_request(
+        self, request_, django_assert_num_queries
+    ):
+        inbox = baker.make(Mailbox, name="INBOX", slug="inbox")
+        email = baker.make(EmailMessage, mailbox=inbox)
+        model_admin = EmailMessageAdmin(EmailMessage, admin.site)
+
+        with django_assert_num_queries(1):
+            first = model_admin.get_object(request_, str(email.pk))
+            second = model_admin.get_object(request_, str(email.pk))
+            assert first.mailbox.name == "INBOX"
+
+        assert first is second
+
+    def test_debounced_change_view_renders_the_email_as_read(self, request_):
+        inbox = baker.make(Mailbox, name="INBOX", slug="inbox")
+        email = baker.make(EmailMessage, mailbox=inbox, uid=7, is_read=False)
+        model_admin = EmailMessageAdmin(EmailMessage, admin.site)
+
+        with patch("sage_mailbox.admin.email.imap_settings") as settings, patch(
+            "sage_mailbox.admin.email._get_seen_flag_batcher"
+        ) as batcher, patch("sage_mailbox.admin.email.messages"), patch(
+            "django.contrib.admin.ModelAdmin.change_view"
+        ):
+            settings.IMAP_SEEN_FLAG_DEBOUNCE = 2
+            model_admin.change_view(request_, str(email.pk))
+
+        batcher.return_value.add.assert_called_once_with("INBOX", 7, email.pk)
+        assert model_admin.get_object(request_, str(email.pk)).is_read is True
+
+    def test_date_range_filter_lists_older_emails(self, request_):
+        inbox = baker.make(Mailbox, name="INBOX", slug="inbox")
+        baker.make(EmailMessage, mailbox=inbox, date=timezone.now())
+        old = baker.make(
+            EmailMessage, mailbox=inbox, date=timezone.now() - timedelta(days=45)
+        )
+        model_admin = EmailMessageAdmin(EmailMessage, admin.site)
+        date_filter = model_admin.get_changelist_instance(request_).filter_specs[0]
+        older = dict(date_filter.links)["Older"]
+
+        request_.GET = request_.GET.copy()
+        request_.GET.update({key: str(value) for key, value in older.items()})
+        changelist = model_admin.get_changelist_instance(request_)
+
+        assert list(changelist.queryset.values_list("id", flat=True)) == [old.id]
+
+    def test_attachment_inline_skips_payload(self, request_):
+        inline = AttachmentInline(EmailMessage, admin.site)
+
+        deferred, defer = inline.get_queryset(request_).query.deferred_loading
+
+        assert defer is False
+        assert "payload" not in deferred
+        assert {"filename", "file", "content_type"} <= set(deferred)
+
+    @pytest.mark.parametrize(
+        "model_admin_class, model, sync_path",
+        [
+            (EmailMessageAdmin, EmailMessage, "sync-emails/"),
+            (TrashAdmin, Trash, "sync-emails/trash/"),
+        ],
+    )
+    def test_sync_url_is_registered_once(self, model_admin_class, model, sync_path):
+        urls = model_admin_class(model, admin.site).get_urls()
+
+        sync_urls = [
+            str(url.pattern) for url in urls if url.name and url.name.endswith("_sync")
+        ]
+
+        assert sync_urls == [sync_path]
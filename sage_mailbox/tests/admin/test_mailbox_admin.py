@@ -0,0 +1,243 @@
+import imaplib
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.contrib import admin
+from django.contrib.admin.models import DELETION, LogEntry
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+
+from sage_mailbox.admin.actions import delete_selected
+from sage_mailbox.admin.mailbox import MailboxAdmin, _pipelined_delete_folders
+from sage_mailbox.models import Mailbox
+
+
+class TestPipelinedDeleteFolders:
+
+    def test_sends_every_delete_before_reading_responses(self):
+        calls = []
+        client = MagicMock()
+        client._command.side_effect = lambda *args: calls.append(args) or len(calls)
+        client._command_complete.side_effect = lambda name, tag: (
+            calls.append(("complete", tag))
+            or (("OK", [b"done"]) if tag != 2 else ("NO", [b"[NONEXISTENT] gone"]))
+        )
+
+        responses = list(_pipelined_delete_folders(client, ["A", "B", "C"]))
+
+        assert responses == [
+            ("OK", "done"),
+            ("NO", "[NONEXISTENT] gone"),
+            ("OK", "done"),
+        ]
+        assert calls[:3] == [("DELETE", "A"), ("DELETE", "B"), ("DELETE", "C")]
+        assert client.selected_mailbox is None
+
+    def test_reads_the_remaining_tags_after_a_bad_response(self):
+        client = MagicMock()
+        client._command.side_effect = [1, 2, 3]
+        client._command_complete.side_effect = [
+            ("OK", [b"done"]),
+            imaplib.IMAP4.error("DELETE command error: BAD [b'bad name']"),
+            ("OK", [b"done"]),
+        ]
+
+        responses = list(_pipelined_delete_folders(client, ["A", "B", "C"]))
+
+        assert [status for status, _text in responses] == ["OK", "BAD", "OK"]
+        assert client._command_complete.call_count == 3
+
+
+@pytest.mark.django_db
+class TestMailboxAdmin:
+
+    def test_changelist_loads_only_displayed_columns(self):
+        request = RequestFactory().get("/admin/sage_mailbox/mailbox/")
+        model_admin = MailboxAdmin(Mailbox, admin.site)
+
+        queryset = model_admin.get_queryset(request)
+
+        fields, defer = queryset.query.deferred_loading
+        assert defer is False
+        assert set(fields) == {
+            "id",
+            "name",
+            "slug",
+            "folder_type",
+            "created_at",
+            "modified_at",
+        }
+        assert model_admin.show_full_result_count is False
+
+    def test_delete_queryset_keeps_folders_the_server_refused(self):
+        kept = baker.make(Mailbox, name="Keep", slug="keep")
+        gone = baker.make(Mailbox, name="Gone", slug="gone")
+        request = RequestFactory().post("/admin/sage_mailbox/mailbox/")
+        request.user = User.objects.create_superuser("admin", "admin@example.com")
+        model_admin = MailboxAdmin(Mailbox, admin.site)
+        responses = {"Keep": ("NO", "permission denied"), "Gone": ("OK", "")}
+
+        with patch("sage_mailbox.admin.mailbox.imap_pool"), patch(
+            "sage_mailbox.admin.mailbox._pipelined_delete_folders",
+            side_effect=lambda client, names: [responses[name] for name in names],
+        ), patch("sage_mailbox.admin.mailbox.messages"):
+            model_admin.delete_queryset(request, Mailbox.objects.all())
+
+        assert list(Mailbox.objects.values_list("id", flat=True)) == [kept.id]
+        assert not Mailbox.objects.filter(id=gone.id).exists()
+
+    def test_delete_queryset_sends_one_message_per_outcome(self):
+        for name in ("A", "B", "C", "D"):
+            baker.make(Mailbox, name=name, slug=name.lower())
+        request = RequestFactory().post("/admin/sage_mailbox/mailbox/")
+        model_admin = MailboxAdmin(Mailbox, admin.site)
+        responses = {
+            "A": ("NO", "permission denied"),
+            "B": ("NO", "permission denied"),
+            "C": ("NO", "[NONEXISTENT] gone"),
+            "D": ("NO", "[NONEXISTENT] gone"),
+        }
+
+        with patch("sage_mailbox.admin.mailbox.imap_pool"), patch(
+            "sage_mailbox.admin.mailbox._pipelined_delete_folders",
+            side_effect=lambda client, names: [responses[name] for name in names],
+        ), patch("sage_mailbox.admin.mailbox.messages") as messages_:
+            model_admin.delete_queryset(request, Mailbox.objects.all())
+
+        messages_.error.assert_called_once()
+        messages_.warning.assert_called_once()
+        messages_.success.assert_not_called()
+        assert '"A": permission denied; "B": permission denied' in (
+            messages_.error.call_args.args[1]
+        )
+
+    def test_delete_queryset_removes_folders_deleted_before_an_error(self):
+        for name in ("A", "B", "C"):
+            baker.make(Mailbox, name=name, slug=name.lower())
+        request = RequestFactory().post("/admin/sage_mailbox/mailbox/")
+        model_admin = MailboxAdmin(Mailbox, admin.site)
+
+        def delete_folders(client, names):
+            yield "OK", ""
+            raise imaplib.IMAP4.abort("connection lost")
+
+        with patch("sage_mailbox.admin.mailbox.imap_pool"), patch(
+            "sage_mailbox.admin.mailbox._pipelined_delete_folders",
+            side_effect=delete_folders,
+        ), patch("sage_mailbox.admin.mailbox.messages") as messages_:
+            model_admin.delete_queryset(request, Mailbox.objects.all())
+
+        assert sorted(Mailbox.objects.values_list("name", flat=True)) == ["B", "C"]
+        messages_.error.assert_called_once()
+        messages_.success.assert_not_called()
+
+    def test_delete_queryset_matches_the_nonexistent_response_code(self):
+        baker.make(Mailbox, name="A", slug="a")
+        request = RequestFactory().post("/admin/sage_mailbox/mailbox/")
+        model_admin = MailboxAdmin(Mailbox, admin.site)
+
+        with patch("sage_mailbox.admin.mailbox.imap_pool"), patch(
+            "sage_mailbox.admin.mailbox._pipelined_delete_folders",
+            return_value=[("NO", "Folder NONEXISTENT-archive is in use")],
+        ), patch("sage_mailbox.admin.mailbox.messages"):
+            model_admin.delete_queryset(request, Mailbox.objects.all())
+
+        assert Mailbox.objects.filter(name="A").exists()
+
+    def test_sync_folders_creates_only_new_mailboxes(self):
+        baker.make(Mailbox, name="INBOX", slug="inbox", folder_type="INBOX")
+        request = RequestFactory().get("/admin/sage_mailbox/mailbox/sync/")
+        model_admin = MailboxAdmin(Mailbox, admin.site)
+
+        with patch("sage_mailbox.admin.mailbox.folder_cache") as folder_cache, patch(
+            "sage_mailbox.admin.mailbox.messages"
+        ):
+            folder_cache.list_folders.return_value = ["INBOX", "Sent", "Trash"]
+            model_admin.sync_folders(request)
+
+        assert dict(Mailbox.objects.values_list("name", "folder_type")) == {
+            "INBOX": "INBOX",
+            "Sent": "SENT",
+            "Trash": "TRASH",
+        }
+        assert Mailbox.objects.get(name="Sent").slug
+
+    def test_sync_folders_gives_colliding_slugs_a_suffix(self):
+        baker.make(Mailbox, name="Work Items", slug="Work-Items")
+        request = RequestFactory().get("/admin/sage_mailbox/mailbox/sync/")
+        model_admin = MailboxAdmin(Mailbox, admin.site)
+
+        with patch("sage_mailbox.admin.mailbox.folder_cache") as folder_cache, patch(
+            "sage_mailbox.admin.mailbox.messages"
+        ) as messages_:
+            folder_cache.list_folders.return_value = [
+                "Work Items",
+                "Work.Items",
+                "Work-Items",
+            ]
+            model_admin.sync_folders(request)
+
+        messages_.error.assert_not_called()
+        assert dict(Mailbox.objects.values_list("name", "slug")) == {
+            "Work Items": "Work-Items",
+            "Work.Items": "Work-Items-2",
+            "Work-Items": "Work-Items-3",
+        }
+
+    def test_delete_selected_logs_deletions_in_one_insert(self):
+        baker.make(Mailbox, name="Old", slug="old")
+        baker.make(Mailbox, name="Older", slug="older")
+        request = RequestFactory().post("/admin/sage_mailbox/mailbox/", {"post": "yes"})
+        request.user = User.objects.create_superuser("admin", "admin@example.com")
+        model_admin = MailboxAdmin(Mailbox, admin.site)
+
+        with patch.object(model_admin, "delete_queryset"), CaptureQueriesContext(
+            connection
+        ) as queries:
+            delete_selected(model_admin, request, Mailbox.objects.all())
+
+        log_inserts = [
+            query
+            for query in queries
+            if query["sql"].startswith('INSERT INTO "django_admin_log"')
+        ]
+        assert len(log_inserts) == 1
+        assert LogEntry.objects.filter(action_flag=DELETION).count() == 2
+
+    def test_save_model_removes_created_folder_when_save_fails(self):
+        request = RequestFactory().post("/admin/sage_mailbox/mailbox/add/")
+        model_admin = MailboxAdmin(Mailbox, admin.site)
+        form = MagicMock(cleaned_data={"name": "Archive"})
+
+        with patch("sage_mailbox.admin.mailbox.imap_pool"), patch(
+            "sage_mailbox.admin.mailbox.IMAPFolderService"
+        ) as folder_service, patch("sage_mailbox.admin.mailbox.messages"), patch(
+            "django.contrib.admin.ModelAdmin.save_model",
+            side_effect=RuntimeError("db down"),
+        ):
+            model_admin.save_model(request, Mailbox(name="Archive"), form, False)
+
+        folder_service.return_value.create_folder.assert_called_once_with("Archive")
+        folder_service.return_value.delete_folder.assert_called_once_with("Archive")
+
+    def test_save_model_renames_from_form_initial_without_a_query(self):
+        mailbox = baker.make(Mailbox, name="Old", slug="old")
+        request = RequestFactory().post("/admin/sage_mailbox/mailbox/")
+        model_admin = MailboxAdmin(Mailbox, admin.site)
+        form = MagicMock(cleaned_data={"name": "New"}, initial={"name": "Old"})
+        mailbox.name = "New"
+
+        with patch("sage_mailbox.admin.mailbox.imap_pool"), patch(
+            "sage_mailbox.admin.mailbox.IMAPFolderService"
+        ) as folder_service, patch("sage_mailbox.admin.mailbox.messages"), patch(
+            "django.contrib.admin.ModelAdmin.save_model"
+        ), CaptureQueriesContext(
+            connection
+        ) as queries:
+            model_admin.save_model(request, mailbox, form, True)
+
+        assert not [q for q in queries if q["sql"].startswith("SELECT")]
+        folder_service.return_value.rename_folder.assert_called_once_with("Old", "New")
@@ -0,0 +1,18 @@
+import pytest
+from model_bakery import baker
+
+from sage_mailbox.admin.paginator import LargeTablePaginator
+from sage_mailbox.models import EmailMessage, Mailbox
+
+
+@pytest.mark.django_db
+class TestLargeTablePaginator:
+
+    def test_count_is_exact_outside_postgresql(self):
+        inbox = baker.make(Mailbox, name="INBOX", slug="inbox")
+        baker.make(EmailMessage, mailbox=inbox, _quantity=3)
+
+        paginator = LargeTablePaginator(EmailMessage.objects.all(), 2)
+
+        assert paginator.count == 3
+        assert paginator.num_pages == 2
@@ -0,0 +1,58 @@
+from unittest.mock import patch
+
+import pytest
+from sage_imap.exceptions import IMAPAuthenticationError
+
+from sage_mailbox.checks import _probe_imap_reachability, check_imap_config
+
+
+@pytest.fixture(autouse=True)
+def clear_probe_cache():
+    _probe_imap_reachability.cache_clear()
+    yield
+    _probe_imap_reachability.cache_clear()
+
+
+class TestCheckImapConfig:
+
+    def test_only_opens_a_tcp_connection_by_default(self):
+        with patch("sage_mailbox.checks.imap_pool") as pool, patch(
+            "sage_mailbox.checks.socket.create_connection"
+        ) as create_connection:
+            errors = check_imap_config(None)
+
+        pool.connection.assert_not_called()
+        create_connection.assert_called_once()
+        create_connection.return_value.close.assert_called_once()
+        assert errors == []
+
+    def test_warns_when_the_server_is_unreachable(self):
+        with patch(
+            "sage_mailbox.checks.socket.create_connection",
+            side_effect=TimeoutError("timed out"),
+        ):
+            errors = check_imap_config(None)
+
+        assert [error.id for error in errors] == ["sage_integration.W001"]
+
+    @pytest.mark.parametrize("port", [None, "imaps"])
+    def test_reports_an_invalid_port_instead_of_raising(self, port):
+        with patch("sage_mailbox.checks.socket.create_connection") as create_connection:
+            errors = _probe_imap_reachability("imap.example.com", port)
+
+        create_connection.assert_not_called()
+        assert [error.id for error in errors] == ["sage_integration.E006"]
+
+    def test_logs_in_through_the_pool_for_deploy_checks(self):
+        with patch("sage_mailbox.checks.imap_pool") as pool:
+            errors = check_imap_config(None, deploy=True)
+
+        pool.connection.assert_called_once()
+        assert errors == []
+
+    def test_reports_failed_login_for_deploy_checks(self):
+        with patch("sage_mailbox.checks.imap_pool") as pool:
+            pool.connection.side_effect = IMAPAuthenticationError("IMAP login failed.")
+            errors = check_imap_config(None, deploy=True)
+
+        assert [error.id for error in errors] == ["sage_integration.E007"]
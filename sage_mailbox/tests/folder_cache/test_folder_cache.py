@@ -0,0 +1,67 @@
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from sage_mailbox.folder_cache import FolderListCache
+
+
+class TestFolderListCache:
+
+    @pytest.fixture
+    def folder_service(self):
+        with patch("sage_mailbox.folder_cache.imap_pool"), patch(
+            "sage_mailbox.folder_cache.IMAPFolderService"
+        ) as folder_service:
+            folder_service.return_value.list_folders.return_value = ["INBOX", "Sent"]
+            yield folder_service
+
+    def test_listing_is_reused_within_ttl(self, folder_service):
+        cache = FolderListCache(ttl=60)
+
+        first = cache.list_folders("imap.example.com", "user", "password")
+        second = cache.list_folders("imap.example.com", "user", "password")
+
+        assert first == second == ["INBOX", "Sent"]
+        assert folder_service.return_value.list_folders.call_count == 1
+
+    def test_invalidate_forces_a_new_listing(self, folder_service):
+        cache = FolderListCache(ttl=60)
+
+        cache.list_folders("imap.example.com", "user", "password")
+        cache.invalidate("imap.example.com", "user")
+        cache.list_folders("imap.example.com", "user", "password")
+
+        assert folder_service.return_value.list_folders.call_count == 2
+
+    def test_concurrent_misses_share_one_listing(self, folder_service):
+        cache = FolderListCache(ttl=60)
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_listing():
+            started.set()
+            release.wait(5)
+            return ["INBOX"]
+
+        folder_service.return_value.list_folders.side_effect = slow_listing
+        results = []
+        owner = threading.Thread(
+            target=lambda: results.append(
+                cache.list_folders("imap.example.com", "user", "password")
+            )
+        )
+        owner.start()
+        started.wait(5)
+        waiter = threading.Thread(
+            target=lambda: results.append(
+                cache.list_folders("imap.example.com", "user", "password")
+            )
+        )
+        waiter.start()
+        release.set()
+        owner.join(5)
+        waiter.join(5)
+
+        assert results == [["INBOX"], ["INBOX"]]
+        assert folder_service.return_value.list_folders.call_count == 1
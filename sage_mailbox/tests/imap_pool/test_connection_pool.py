@@ -0,0 +1,109 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from sage_mailbox.imap_pool import IMAPConnectionPool
+
+
+class FakeIMAPClient:
+    def __init__(self, host, username, password):
+        self.connection = None
+
+    def connect(self):
+        self.connection = MagicMock()
+        return self.connection
+
+    def disconnect(self):
+        self.connection = None
+
+
+class TestIMAPConnectionPool:
+
+    @pytest.fixture
+    def client_class(self):
+        with patch(
+            "sage_mailbox.imap_pool.IMAPClient", side_effect=FakeIMAPClient
+        ) as client_class:
+            yield client_class
+
+    def test_connection_is_reused(self, client_class):
+        pool = IMAPConnectionPool()
+
+        with pool.connection("imap.example.com", "user", "password") as first:
+            pass
+        with pool.connection("imap.example.com", "user", "password") as second:
+            pass
+
+        assert first is second
+        assert client_class.call_count == 1
+        first.noop.assert_called_once()
+
+    def test_connection_is_discarded_after_error(self, client_class):
+        pool = IMAPConnectionPool()
+
+        with pytest.raises(RuntimeError):
+            with pool.connection("imap.example.com", "user", "password"):
+                raise RuntimeError("boom")
+        with pool.connection("imap.example.com", "user", "password"):
+            pass
+
+        assert client_class.call_count == 2
+
+    def test_idle_connection_expires(self, client_class):
+        pool = IMAPConnectionPool(idle_timeout=-1)
+
+        with pool.connection("imap.example.com", "user", "password"):
+            pass
+        with pool.connection("imap.example.com", "user", "password"):
+            pass
+
+        assert client_class.call_count == 2
+
+    def test_selected_mailbox_is_not_selected_again(self, client_class):
+        pool = IMAPConnectionPool()
+
+        with pool.connection("imap.example.com", "user", "password") as client:
+            client._connection.select.return_value = ("OK", [b"3"])
+            client.select("INBOX")
+        with pool.connection("imap.example.com", "user", "password") as client:
+            assert client.select("INBOX") == ("OK", [b"3"])
+            client.select("Trash")
+
+        assert client._connection.select.call_count == 2
+
+    def test_untagged_responses_do_not_pile_up(self, client_class):
+        pool = IMAPConnectionPool()
+
+        with pool.connection("imap.example.com", "user", "password") as client:
+            client._connection.untagged_responses = {}
+            client._connection.select.return_value = ("OK", [b"3"])
+            client.select("INBOX")
+            client.untagged_responses["FETCH"] = [b"1 (FLAGS (\\Seen))"]
+        assert client.untagged_responses == {}
+
+        with pool.connection("imap.example.com", "user", "password") as client:
+            client.untagged_responses["EXISTS"] = [b"4"]
+            client.select("INBOX")
+            assert client.untagged_responses == {}
+
+    def test_new_connections_resume_the_last_tls_session(self):
+        sessions = []
+
+        class FakeResumingClient(FakeIMAPClient):
+            def __init__(self, host, username, password, ssl_context, session=None):
+                super().__init__(host, username, password)
+                sessions.append((ssl_context, session))
+
+        pool = IMAPConnectionPool(tls_session_reuse=True)
+        with patch(
+            "sage_mailbox.imap_pool.TLSResumingIMAPClient",
+            side_effect=FakeResumingClient,
+        ):
+            with pool.connection("imap.example.com", "user", "password") as first:
+                with pool.connection("imap.example.com", "user", "password"):
+                    pass
+
+        (first_context, first_session), (second_context, second_session) = sessions
+        assert first_session is None
+        assert second_session is first.sock.session
+        assert second_context is first_context
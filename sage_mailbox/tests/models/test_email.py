@@ -1,7 +1,15 @@
+from unittest.mock import patch
+
 import pytest
+from django.core.files.storage import FileSystemStorage
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from model_bakery import baker
-from sage_mailbox.models import EmailMessage
+from sage_imap.helpers.enums import Flag as FlagEnum
+from sage_imap.models.email import Attachment as AttachmentDC
+from sage_imap.models.email import EmailMessage as EmailMessageDC
+from sage_mailbox.models import Attachment, EmailMessage, Flag
 
 
 @pytest.mark.django_db
@@ -24,6 +32,48 @@ class TestEmailMessageModel:
 
         assert email_dc.subject == "Test subject"
 
+    def test_from_dataclass_stores_attachment_payload_in_file(self, tmp_path):
+        """Test attachment bytes are written to the file, not the row."""
+        email_dc = EmailMessageDC(
+            message_id="<1@example.com>",
+            subject="Report",
+            from_address="sender@example.com",
+            uid=1,
+            attachments=[
+                AttachmentDC(
+                    filename="report.pdf",
+                    content_type="application/pdf",
+                    payload=b"pdf",
+                )
+            ],
+        )
+        file_field = Attachment._meta.get_field("file")
+
+        with patch.object(file_field, "storage", FileSystemStorage(tmp_path)):
+            email = EmailMessage.from_dataclass(email_dc)
+            attachment = Attachment.objects.get(email_message=email)
+
+            assert attachment.payload == b"pdf"
+        assert "payload" not in {field.name for field in Attachment._meta.fields}
+
+    def test_from_dataclass_links_new_and_existing_flags(self):
+        """Test flags are reused or created and linked in bulk."""
+        seen = baker.make(Flag, name="Seen")
+        email_dc = EmailMessageDC(
+            message_id="<2@example.com>",
+            from_address="sender@example.com",
+            date="2024-01-02T03:04:05+00:00",
+            uid=2,
+            flags=[FlagEnum.SEEN, FlagEnum.FLAGGED],
+        )
+
+        email = EmailMessage.from_dataclass(email_dc)
+
+        assert set(email.flags.values_list("name", flat=True)) == {"Seen", "Flagged"}
+        assert Flag.objects.filter(name="Seen").get() == seen
+        email.refresh_from_db()
+        assert email.date.isoformat() == "2024-01-02T03:04:05+00:00"
+
     def test_has_attachments_method(self):
         """Test has_attachments method for EmailMessage."""
         email = baker.make(EmailMessage)
@@ -31,6 +81,46 @@ class TestEmailMessageModel:
 
         assert email.has_attachments() is True
 
+    def test_attachment_count_follows_attachments(self):
+        """Test attachment_count follows attachment saves and deletes."""
+        email = baker.make(EmailMessage)
+        attachments = baker.make(
+            'sage_mailbox.Attachment', email_message=email, _quantity=3
+        )
+        attachments[0].delete()
+
+        email.refresh_from_db()
+        assert email.attachment_count == 2
+
+    def test_deleting_an_email_fast_deletes_its_attachments(self):
+        """Test the attachment cascade neither loads nor recounts attachments."""
+        email = baker.make(EmailMessage)
+        baker.make('sage_mailbox.Attachment', email_message=email, _quantity=5)
+
+        with CaptureQueriesContext(connection) as queries:
+            email.delete()
+
+        sql = [query["sql"] for query in queries]
+        assert not [q for q in sql if q.startswith("UPDATE")]
+        assert not [
+            q for q in sql if q.startswith("SELECT") and '"sage_attachment"' in q
+        ]
+        assert not Attachment.objects.exists()
+
+    def test_refresh_attachment_counts_backfills_the_column(self):
+        """Test stale counts are recomputed from the stored attachments."""
+        email = baker.make(EmailMessage)
+        baker.make('sage_mailbox.Attachment', email_message=email, _quantity=2)
+        empty = baker.make(EmailMessage)
+        EmailMessage.objects.update(attachment_count=7)
+
+        EmailMessage.objects.refresh_attachment_counts()
+
+        assert dict(EmailMessage.objects.values_list("pk", "attachment_count")) == {
+            email.pk: 2,
+            empty.pk: 0,
+        }
+
     def test_get_summary(self):
         """Test get_summary method."""
         email = baker.make(
@@ -44,3 +134,60 @@ class TestEmailMessageModel:
         assert summary["subject"] == "Test"
         assert summary["from"] == "from@example.com"
         assert "has_attachments" in summary
+
+
+@pytest.mark.django_db
+class TestSendEmailSignal:
+
+    @pytest.fixture(autouse=True)
+    def connect_receiver(self):
+        # The receiver is registered when the signals module is imported.
+        from sage_mailbox.signals import email as email_signals
+
+        return email_signals
+
+    @pytest.mark.parametrize("async_enabled", [False, True])
+    def test_fetched_email_is_not_sent(
+        self, async_enabled, django_capture_on_commit_callbacks
+    ):
+        """Test an email saved with its raw message is never sent again."""
+        email_dc = EmailMessageDC(
+            message_id="<3@example.com>",
+            from_address="sender@example.com",
+            to_address=["recipient@example.com"],
+            uid=3,
+            raw=b"Subject: Fetched\r\n\r\nBody",
+        )
+
+        with patch("sage_mailbox.signals.email.send_email") as send_email, patch(
+            "sage_mailbox.signals.email.imap_settings"
+        ) as settings, django_capture_on_commit_callbacks(execute=True) as callbacks:
+            settings.IMAP_ASYNC_ACTIONS_ENABLED = async_enabled
+            EmailMessage.from_dataclass(email_dc)
+
+        assert callbacks == []
+        send_email.assert_not_called()
+
+    def test_composed_email_is_sent(self, django_capture_on_commit_callbacks):
+        """Test a new email without a raw message is sent after commit."""
+        with patch("sage_mailbox.signals.email.send_email") as send_email, patch(
+            "sage_mailbox.signals.email.imap_settings"
+        ) as settings, django_capture_on_commit_callbacks(execute=True):
+            settings.IMAP_ASYNC_ACTIONS_ENABLED = False
+            email = baker.make(EmailMessage, to_address="recipient@example.com")
+
+        send_email.assert_called_once_with(email)
+
+    def test_composed_email_is_queued_when_async(
+        self, django_capture_on_commit_callbacks
+    ):
+        """Test a new email without a raw message is queued on Celery."""
+        pytest.importorskip("celery")
+
+        with patch("sage_mailbox.tasks.send_email_task") as send_email_task, patch(
+            "sage_mailbox.signals.email.imap_settings"
+        ) as settings, django_capture_on_commit_callbacks(execute=True):
+            settings.IMAP_ASYNC_ACTIONS_ENABLED = True
+            email = baker.make(EmailMessage, to_address="recipient@example.com")
+
+        send_email_task.delay.assert_called_once_with(email.pk)
@@ -0,0 +1,71 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from sage_mailbox.models import Mailbox
+
+
+@pytest.mark.django_db
+class TestMailboxModel:
+
+    def test_colliding_slugs_get_the_next_free_index(self):
+        """Test slug collisions are resolved with one lookup each."""
+        Mailbox.objects.create(name="Projects.2024")
+        Mailbox.objects.create(name="Projects 2024")
+
+        with CaptureQueriesContext(connection) as queries:
+            mailbox = Mailbox.objects.create(name="Projects-2024")
+
+        assert mailbox.slug == "Projects-2024-3"
+        slug_lookups = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith("SELECT") and "slug" in query["sql"]
+        ]
+        assert len(slug_lookups) == 1
+
+    def test_free_slug_is_saved_without_a_lookup(self):
+        """Test a mailbox without a slug collision is inserted straight away."""
+        with CaptureQueriesContext(connection) as queries:
+            mailbox = Mailbox.objects.create(name="Receipts")
+
+        assert mailbox.slug == "Receipts"
+        assert not [q for q in queries if q["sql"].startswith("SELECT")]
+
+    def test_resaving_keeps_the_slug(self):
+        """Test an unchanged mailbox does not collide with itself."""
+        mailbox = Mailbox.objects.create(name="Archive")
+
+        mailbox.save()
+
+        assert mailbox.slug == "Archive"
+
+    def test_resaving_keeps_the_suffixed_slug(self):
+        """Test a suffixed slug survives saves without another lookup."""
+        Mailbox.objects.create(name="Projects.2024")
+        mailbox = Mailbox.objects.create(name="Projects 2024")
+
+        with CaptureQueriesContext(connection) as queries:
+            mailbox.save()
+
+        assert mailbox.slug == "Projects-2024-2"
+        assert not [q for q in queries if q["sql"].startswith("SELECT")]
+
+    def test_bulk_created_mailboxes_get_unique_slugs(self):
+        """Test slugs colliding with the table or the batch get a suffix."""
+        Mailbox.objects.create(name="Work Items")
+        mailboxes = [
+            Mailbox(name="Work.Items"),
+            Mailbox(name="Work-Items"),
+            Mailbox(name="Archive"),
+        ]
+
+        Mailbox._meta.get_field("slug").assign_unique_slugs(mailboxes)
+        Mailbox.objects.bulk_create(mailboxes)
+
+        assert dict(Mailbox.objects.values_list("name", "slug")) == {
+            "Work Items": "Work-Items",
+            "Work.Items": "Work-Items-2",
+            "Work-Items": "Work-Items-3",
+            "Archive": "Archive",
+        }
@@ -0,0 +1,251 @@
+import imaplib
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from sage_imap.exceptions import IMAPMailboxError
+from sage_imap.helpers.enums import Flag, FlagCommand
+
+from sage_mailbox.models import Attachment, EmailMessage, Mailbox
+from sage_mailbox.repository.service import (
+    STANDARD_MAILBOX_CACHE_KEY,
+    EmailActionService,
+    SeenFlagBatcher,
+    _apply_move,
+    _compress_uids,
+    _pipelined_uid_store,
+    _standard_mailbox_name,
+)
+
+
+class TestCompressUids:
+
+    @pytest.mark.parametrize(
+        "uids, expected",
+        [
+            ([5], "5"),  # Single UID
+            ([1, 2, 3], "1:3"),  # Consecutive run
+            ([7, 1, 3, 2], "1:3,7"),  # Unsorted input
+            ([1, 2, 4, 5, 9], "1:2,4:5,9"),  # Several runs
+            ([3, 3, 4], "3:4"),  # Duplicates collapse
+        ],
+    )
+    def test_compress_uids(self, uids, expected):
+        assert _compress_uids(uids) == expected
+
+
+class TestApplyMove:
+
+    def test_failed_batch_is_not_retried(self):
+        calls = []
+
+        def operation(message_set):
+            calls.append(message_set.msg_ids)
+            raise IMAPMailboxError("EXPUNGE failed")
+
+        processed = _apply_move(operation, [1, 2, 3, 4], [11, 12, 13, 14])
+
+        assert processed == []
+        assert calls == ["1:4"]
+
+    def test_successful_batch_returns_its_ids(self):
+        processed = _apply_move(lambda message_set: None, [1, 2], [11, 12])
+
+        assert processed == [11, 12]
+
+
+@pytest.mark.django_db
+class TestStandardMailboxName:
+
+    def test_name_is_cached_until_a_mailbox_is_saved(self, django_assert_num_queries):
+        trash = baker.make(Mailbox, name="Trash", slug="trash", folder_type="TRASH")
+        _standard_mailbox_name("TRASH")
+
+        with django_assert_num_queries(0):
+            assert _standard_mailbox_name("TRASH") == "Trash"
+
+        trash.name = "Deleted Items"
+        trash.save()
+
+        assert cache.get(STANDARD_MAILBOX_CACHE_KEY.format("TRASH")) is None
+        assert _standard_mailbox_name("TRASH") == "Deleted Items"
+
+
+class TestPipelinedUidStore:
+
+    @pytest.fixture
+    def client(self):
+        client = MagicMock()
+        client._command.side_effect = ["A1", "A2", "A3"]
+        client.untagged_responses = {"FETCH": [b"1 (FLAGS (\\Seen))"]}
+        return client
+
+    def test_reads_every_tag_when_one_batch_is_rejected(self, client):
+        client._command_complete.side_effect = [
+            ("OK", [None]),
+            imaplib.IMAP4.error("UID command error: BAD"),
+            ("OK", [None]),
+        ]
+
+        statuses = _pipelined_uid_store(
+            client, ["1:2", "5", "9"], FlagCommand.ADD, Flag.SEEN
+        )
+
+        assert statuses == ["OK", "BAD", "OK"]
+        assert client._command_complete.call_count == 3
+        assert "FETCH" not in client.untagged_responses
+
+    def test_raises_when_the_connection_aborts(self, client):
+        client._command_complete.side_effect = imaplib.IMAP4.abort("socket error")
+
+        with pytest.raises(imaplib.IMAP4.abort):
+            _pipelined_uid_store(client, ["1:2", "5"], FlagCommand.ADD, Flag.SEEN)
+
+        assert "FETCH" not in client.untagged_responses
+
+
+@pytest.mark.django_db
+class TestEmailActionService:
+
+    @pytest.fixture
+    def imap_connection(self):
+        connection = MagicMock()
+        connection.select.return_value = ("OK", [b"1"])
+        connection.uid.return_value = ("OK", [None])
+        connection.check.return_value = ("OK", [None])
+        with patch("sage_mailbox.repository.service.imap_pool") as pool:
+            pool.connection.return_value.__enter__.return_value = connection
+            connection.pool = pool
+            yield connection
+
+    def test_mark_as_read_stores_one_batch_per_mailbox(self, imap_connection):
+        inbox = baker.make(Mailbox, name="INBOX", slug="inbox")
+        archive = baker.make(Mailbox, name="Archive", slug="archive")
+        baker.make(EmailMessage, mailbox=inbox, uid=iter([1, 2, 3]), _quantity=3)
+        baker.make(EmailMessage, mailbox=archive, uid=9, is_read=True)
+
+        service = EmailActionService("imap.example.com", "user", "password")
+        updated = service.mark_as_read(EmailMessage.objects.all())
+
+        assert updated == 3
+        imap_connection.uid.assert_called_once_with(
+            "STORE", "1:3", FlagCommand.ADD, Flag.SEEN
+        )
+        assert EmailMessage.objects.filter(is_read=False).count() == 0
+
+    def test_mark_as_read_updates_database_in_one_statement(self, imap_connection):
+        inbox = baker.make(Mailbox, name="INBOX", slug="inbox")
+        baker.make(EmailMessage, mailbox=inbox, uid=iter([1, 2, 3]), _quantity=3)
+
+        service = EmailActionService("imap.example.com", "user", "password")
+        with CaptureQueriesContext(connection) as queries:
+            service.mark_as_read(EmailMessage.objects.all())
+
+        updates = [q["sql"] for q in queries if q["sql"].startswith("UPDATE")]
+        assert len(updates) == 1
+        assert EmailMessage.objects.filter(is_read=True).count() == 3
+
+    def test_mark_as_flagged_pipelines_batches_in_one_folder(self, imap_connection):
+        inbox = baker.make(Mailbox, name="INBOX", slug="inbox")
+        baker.make(EmailMessage, mailbox=inbox, uid=iter([1, 2, 5]), _quantity=3)
+        imap_connection._command.side_effect = ["A1", "A2"]
+        imap_connection._command_complete.return_value = ("OK", [None])
+
+        service = EmailActionService("imap.example.com", "user", "password")
+        with patch("sage_mailbox.repository.service.IMAP_UID_BATCH_SIZE", 2):
+            updated = service.mark_as_flagged(EmailMessage.objects.all())
+
+        assert updated == 3
+        imap_connection.uid.assert_not_called()
+        assert [c.args for c in imap_connection._command.call_args_list] == [
+            ("UID", "STORE", "1:2", FlagCommand.ADD, Flag.FLAGGED),
+            ("UID", "STORE", "5", FlagCommand.ADD, Flag.FLAGGED),
+        ]
+        assert EmailMessage.objects.filter(is_flagged=True).count() == 3
+
+    def test_mark_as_unread_uses_one_connection_per_folder(self, imap_connection):
+        inbox = baker.make(Mailbox, name="INBOX", slug="inbox")
+        archive = baker.make(Mailbox, name="Archive", slug="archive")
+        baker.make(EmailMessage, mailbox=inbox, uid=1, is_read=True)
+        baker.make(EmailMessage, mailbox=archive, uid=2, is_read=True)
+
+        service = EmailActionService("imap.example.com", "user", "password")
+        updated = service.mark_as_unread(EmailMessage.objects.all())
+
+        assert updated == 2
+        assert imap_connection.pool.connection.call_count == 2
+        assert EmailMessage.objects.filter(is_read=True).count() == 0
+
+    def test_mark_as_read_keeps_folders_that_were_stored(self, imap_connection):
+        inbox = baker.make(Mailbox, name="INBOX", slug="inbox")
+        archive = baker.make(Mailbox, name="Archive", slug="archive")
+        baker.make(EmailMessage, mailbox=inbox, uid=iter([1, 2]), _quantity=2)
+        failed = baker.make(EmailMessage, mailbox=archive, uid=9)
+        imap_connection.uid.side_effect = lambda command, sequence_set, *args: (
+            ("NO", [b"STORE failed"]) if sequence_set == "9" else ("OK", [None])
+        )
+
+        service = EmailActionService("imap.example.com", "user", "password")
+        updated = service.mark_as_read(EmailMessage.objects.all())
+
+        assert updated == 2
+        assert list(EmailMessage.objects.filter(is_read=False)) == [failed]
+
+    def test_move_to_trash_deletes_whole_selection(self, imap_connection):
+        inbox = baker.make(Mailbox, name="INBOX", slug="inbox")
+        baker.make(Mailbox, name="Trash", slug="trash", folder_type="TRASH")
+        email = baker.make(EmailMessage, mailbox=inbox, uid=4)
+        baker.make("sage_mailbox.Attachment", email_message=email)
+        kept = baker.make(EmailMessage, mailbox=inbox, uid=5)
+
+        service = EmailActionService("imap.example.com", "user", "password")
+        queryset = EmailMessage.objects.total_attachments().exclude(id=kept.id)
+        moved = service.move_to_trash(queryset)
+
+        assert moved == 1
+        assert list(EmailMessage.objects.values_list("id", flat=True)) == [kept.id]
+        assert not Attachment.objects.exists()
+        assert not EmailMessage.flags.through.objects.exists()
+
+    def test_clear_trash_deletes_trash_emails_only(self, imap_connection):
+        inbox = baker.make(Mailbox, name="INBOX", slug="inbox", folder_type="INBOX")
+        trash = baker.make(Mailbox, name="Trash", slug="trash", folder_type="TRASH")
+        trashed = baker.make(EmailMessage, mailbox=trash, uid=iter([1, 2]), _quantity=2)
+        baker.make("sage_mailbox.Attachment", email_message=trashed[0])
+        trashed[1].flags.add(baker.make("sage_mailbox.Flag", name="Seen"))
+        kept = baker.make(EmailMessage, mailbox=inbox, uid=3)
+
+        service = EmailActionService("imap.example.com", "user", "password")
+        with patch(
+            "sage_mailbox.repository.service.IMAPMailboxUIDService"
+        ) as mailbox_service:
+            mailbox_service.return_value.uid_search.return_value = ["1", "2", "7"]
+            with patch("sage_mailbox.repository.service.IMAP_UID_BATCH_SIZE", 2):
+                deleted = service.clear_trash()
+
+        assert deleted == 2
+        assert [c.args for c in imap_connection.uid.call_args_list] == [
+            ("STORE", "1:2", FlagCommand.ADD, Flag.DELETED),
+            ("STORE", "7", FlagCommand.ADD, Flag.DELETED),
+        ]
+        assert mailbox_service.return_value.uid_delete.call_count == 2
+        assert list(EmailMessage.objects.values_list("id", flat=True)) == [kept.id]
+        assert not Attachment.objects.exists()
+        assert not EmailMessage.flags.through.objects.exists()
+
+    def test_seen_flag_batcher_stores_queued_uids_together(self, imap_connection):
+        inbox = baker.make(Mailbox, name="INBOX", slug="inbox")
+        emails = baker.make(EmailMessage, mailbox=inbox, uid=iter([4, 5]), _quantity=2)
+
+        batcher = SeenFlagBatcher("imap.example.com", "user", "password", delay=60)
+        for email in emails:
+            batcher.add(inbox.name, email.uid, email.pk)
+        batcher.flush()
+
+        imap_connection.uid.assert_called_once_with(
+            "STORE", "4:5", FlagCommand.ADD, Flag.SEEN
+        )
+        assert EmailMessage.objects.filter(is_read=True).count() == 2
@@ -3,15 +3,15 @@ from django.utils import timezone
 from model_bakery import baker
 from datetime import datetime
 from sage_mailbox.models import EmailMessage, Flag, Mailbox
-from autoslug import AutoSlugField
+from sage_mailbox.models.fields import UniqueAutoSlugField
 from django.db.models import F
 
 
-# Register the custom generator for AutoSlugField
+# Register the custom generator for UniqueAutoSlugField
 def slug_generator():
     return 'test-slug'
 
-baker.generators.add(AutoSlugField, slug_generator)
+baker.generators.add(UniqueAutoSlugField, slug_generator)
 
 
 @pytest.mark.django_db
@@ -38,6 +38,17 @@ class TestEmailMessageQuerySet:
         assert queryset.get(id=email[0].id).has_attachments is True
         assert queryset.get(id=email[1].id).has_attachments is False
 
+    def test_has_attachments_keeps_one_row_per_email(self):
+        """Test emails with several attachments are not duplicated."""
+        email = baker.make(EmailMessage)
+        baker.make('sage_mailbox.Attachment', email_message=email, _quantity=3)
+
+        queryset = EmailMessage.objects.has_attachments().total_attachments()
+        assert "JOIN" not in str(queryset.query)
+        assert queryset.count() == 1
+        assert queryset.get(id=email.id).has_attachments is True
+        assert queryset.get(id=email.id).total_attachments == 3
+
     def test_select_related_mailbox(self, django_assert_num_queries):
         """Test select_related optimization for mailbox."""
         mailbox = baker.make(Mailbox)
@@ -72,6 +83,44 @@ class TestEmailMessageQuerySet:
         assert EmailMessage.objects.flagged().count() == 3
 
 
+    def test_with_attachment_stats(self):
+        """Test both attachment annotations come from a single join."""
+        email = baker.make(EmailMessage)
+        empty = baker.make(EmailMessage)
+        baker.make('sage_mailbox.Attachment', email_message=email, _quantity=3)
+
+        queryset = EmailMessage.objects.with_attachment_stats()
+        assert str(queryset.query).count("JOIN") == 1
+        assert queryset.get(id=email.id).total_attachments == 3
+        assert queryset.get(id=email.id).has_attachments is True
+        assert queryset.get(id=empty.id).has_attachments is False
+
+    def test_for_admin(self):
+        """Test the admin queryset joins the mailbox and filters by folder."""
+        sent = baker.make(Mailbox, name="Sent", slug="sent", folder_type="SENT")
+        inbox = baker.make(Mailbox, name="INBOX", slug="inbox", folder_type="INBOX")
+        email = baker.make(EmailMessage, mailbox=sent)
+        baker.make(EmailMessage, mailbox=inbox)
+
+        queryset = EmailMessage.objects.for_admin("SENT")
+        assert list(queryset) == [email]
+        assert "mailbox" in queryset.query.select_related
+        assert EmailMessage.objects.for_admin().count() == 2
+
+    def test_with_full_context(self, django_assert_num_queries):
+        """Test to_dataclass reads prefetched attachments and flags."""
+        emails = baker.make(EmailMessage, _quantity=2)
+        for email in emails:
+            baker.make('sage_mailbox.Attachment', email_message=email, _quantity=2)
+            email.flags.add(baker.make(Flag))
+
+        with django_assert_num_queries(3):
+            dataclasses = [
+                email.to_dataclass()
+                for email in EmailMessage.objects.with_full_context()
+            ]
+        assert len(dataclasses) == 2
+
 @pytest.mark.django_db
 class TestEmailMessageManager:
     
@@ -157,3 +157,243 @@
 
 #         mock_django_email_message.update_or_create.assert_called_once()
 #         assert result == (True, 0)  # One email and zero attachments created
+
+
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from sage_imap.helpers.enums import Flag
+from sage_imap.models.email import Attachment, EmailMessage
+
+from sage_mailbox.models import EmailMessage as DjangoEmailMessage
+from sage_mailbox.models import Mailbox as DjangoMailbox
+from sage_mailbox.repository.service import (
+    EmailSyncService,
+    _parse_email_date,
+    _save_to_storage,
+)
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "2021-01-01T10:00:00+00:00",
+        "Fri, 01 Jan 2021 10:00:00 +0000",
+        "January 1 2021 10:00 UTC",
+    ],
+)
+def test_parse_email_date(value):
+    parsed = _parse_email_date(value)
+
+    assert parsed == datetime(2021, 1, 1, 10, tzinfo=timezone.utc)
+
+
+def test_save_to_storage_keeps_the_order_of_the_files():
+    files = [(f"attachments/{index}.txt", b"data") for index in range(20)]
+
+    with patch("sage_mailbox.repository.service.default_storage") as storage:
+        storage.save.side_effect = lambda name, content: f"stored/{name}"
+        stored = _save_to_storage(files)
+
+    assert stored == [f"stored/{name}" for name, _content in files]
+
+
+@pytest.mark.django_db
+class TestSaveEmailsToDb:
+
+    @pytest.fixture
+    def mailbox(self):
+        return baker.make(DjangoMailbox, name="INBOX", slug="inbox")
+
+    @pytest.fixture
+    def storage(self):
+        with patch("sage_mailbox.repository.service.default_storage") as storage:
+            storage.save.side_effect = lambda name, content: name
+            yield storage
+
+    def make_email(self, uid, flags=(), attachments=()):
+        return EmailMessage(
+            message_id=f"<{uid}@example.com>",
+            subject=f"Subject {uid}",
+            from_address="sender@example.com",
+            date="Fri, 01 Jan 2021 10:00:00 +0000",
+            uid=uid,
+            flags=list(flags),
+            attachments=list(attachments),
+        )
+
+    def test_creates_and_updates_in_bulk(self, mailbox, storage):
+        service = EmailSyncService("imap.example.com", "user", "password")
+        attachment = Attachment(
+            filename="report.pdf", content_type="application/pdf", payload=b"pdf"
+        )
+        existing = baker.make(DjangoEmailMessage, uid=1, subject="Old", mailbox=mailbox)
+        emails = [
+            self.make_email(1, flags=[Flag.SEEN]),
+            *(self.make_email(uid, attachments=[attachment]) for uid in range(2, 12)),
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            result = service.save_emails_to_db(emails, mailbox)
+
+        assert result == {"created_emails": 10, "created_attachments": 10}
+        assert len(queries) < 20
+        existing.refresh_from_db()
+        assert existing.subject == "Subject 1"
+        assert existing.is_read is True
+        assert list(existing.flags.values_list("name", flat=True)) == [Flag.SEEN.value]
+        created = DjangoEmailMessage.objects.get(uid=5)
+        assert created.attachment_count == 1
+        assert created.attachments.get().filename == "report.pdf"
+
+    def test_resync_does_not_duplicate_rows(self, mailbox, storage):
+        service = EmailSyncService("imap.example.com", "user", "password")
+        emails = [self.make_email(uid, flags=[Flag.FLAGGED]) for uid in (1, 2)]
+
+        service.save_emails_to_db(emails, mailbox, batch_size=1)
+        result = service.save_emails_to_db(emails, mailbox, batch_size=1)
+
+        assert result == {"created_emails": 0, "created_attachments": 0}
+        assert DjangoEmailMessage.objects.count() == 2
+        assert DjangoEmailMessage.objects.filter(is_flagged=True).count() == 2
+
+    def test_same_uid_in_another_mailbox_is_a_new_email(self, mailbox, storage):
+        trash = baker.make(DjangoMailbox, name="Trash", slug="trash")
+        service = EmailSyncService("imap.example.com", "user", "password")
+
+        service.save_emails_to_db([self.make_email(1)], mailbox)
+        result = service.save_emails_to_db([self.make_email(1)], trash)
+
+        assert result["created_emails"] == 1
+        assert set(DjangoEmailMessage.objects.values_list("mailbox__name", "uid")) == {
+            ("INBOX", 1),
+            ("Trash", 1),
+        }
+
+    def test_handle_attachments_updates_existing_files_in_bulk(self, mailbox, storage):
+        service = EmailSyncService("imap.example.com", "user", "password")
+        email = baker.make(DjangoEmailMessage, uid=1, mailbox=mailbox)
+        baker.make(
+            "sage_mailbox.Attachment",
+            email_message=email,
+            filename="report.pdf",
+            content_type="text/plain",
+        )
+        attachments = [
+            Attachment(
+                filename="report.pdf", content_type="application/pdf", payload=b"pdf"
+            ),
+            Attachment(filename="notes.txt", content_type="text/plain", payload=b"hi"),
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            count = service.handle_attachments(email, attachments)
+
+        assert count == 2
+        assert len(queries) <= 4
+        assert dict(email.attachments.values_list("filename", "content_type")) == {
+            "report.pdf": "application/pdf",
+            "notes.txt": "text/plain",
+        }
+        email.refresh_from_db()
+        assert email.attachment_count == 2
+
+    def test_handle_flags_only_writes_changed_links(self, mailbox):
+        service = EmailSyncService("imap.example.com", "user", "password")
+        email = baker.make(DjangoEmailMessage, uid=1, mailbox=mailbox)
+        service.handle_flags(email, [Flag.SEEN, Flag.FLAGGED])
+        seen_link = email.flags.through.objects.get(flag__name=Flag.SEEN.value)
+
+        with CaptureQueriesContext(connection) as queries:
+            service.handle_flags(email, [Flag.SEEN, Flag.ANSWERED])
+
+        # Only the new flag is looked up and created (3 queries); then the
+        # links are loaded, the stale one deleted and the new one inserted.
+        assert len(queries) == 6
+        assert set(email.flags.values_list("name", flat=True)) == {
+            Flag.SEEN.value,
+            Flag.ANSWERED.value,
+        }
+        assert email.flags.through.objects.filter(pk=seen_link.pk).exists()
+
+
+class FakeIMAPMailbox:
+    """In-memory ``IMAPMailboxService`` serving messages from ``store`` by UID."""
+
+    def __init__(self):
+        self.store = {}
+        self.fetched = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def select(self, folder):
+        self.selected = folder
+
+    def search(self, criteria):
+        return list(self.store)
+
+    def fetch(self, msg_set, part):
+        msg_ids = msg_set.msg_ids.split(",")
+        self.fetched.append(msg_ids)
+        return [self.store[msg_id] for msg_id in msg_ids]
+
+
+@pytest.fixture
+def imap_mailbox():
+    imap_mailbox = FakeIMAPMailbox()
+    with patch("sage_mailbox.repository.service.imap_pool"), patch(
+        "sage_mailbox.repository.service.IMAPMailboxService",
+        return_value=imap_mailbox,
+    ):
+        yield imap_mailbox
+
+
+@pytest.mark.django_db
+class TestFetchAndSaveEmails:
+
+    def test_fetches_and_saves_in_uid_batches(self, imap_mailbox):
+        baker.make(DjangoMailbox, name="INBOX", slug="inbox")
+        service = EmailSyncService("imap.example.com", "user", "password")
+        imap_mailbox.store = {str(uid): f"message {uid}" for uid in range(1, 251)}
+
+        with patch.object(
+            service,
+            "save_emails_to_db",
+            return_value={"created_emails": 2, "created_attachments": 1},
+        ) as save_emails_to_db:
+            result = service.fetch_and_save_emails("INBOX", batch_size=100)
+
+        assert [len(msg_ids) for msg_ids in imap_mailbox.fetched] == [100, 100, 50]
+        saved = [
+            message
+            for call in save_emails_to_db.call_args_list
+            for message in call.args[0]
+        ]
+        assert saved == list(imap_mailbox.store.values())
+        assert result == {"created_emails": 6, "created_attachments": 3}
+
+    def test_looks_up_the_folder_by_exact_name_once(self, imap_mailbox):
+        baker.make(DjangoMailbox, name="Sent Items", slug="sent-items")
+        service = EmailSyncService("imap.example.com", "user", "password")
+        imap_mailbox.store = {"1": "message 1"}
+
+        with patch.object(
+            service,
+            "save_emails_to_db",
+            return_value={"created_emails": 0, "created_attachments": 0},
+        ) as save_emails_to_db:
+            service.fetch_and_save_emails("Sent")
+            with CaptureQueriesContext(connection) as queries:
+                service.fetch_and_save_emails("Sent")
+
+        mailboxes = {call.args[1] for call in save_emails_to_db.call_args_list}
+        assert [mailbox.name for mailbox in mailboxes] == ["Sent"]
+        assert not [q for q in queries if 'FROM "sage_mailbox"' in q["sql"]]
@@ -5,19 +5,21 @@ from django.core.exceptions import ValidationError
 from sage_mailbox.validators import CommaSeparatedEmailValidator
 
 
-class TestCommaSeparatedEmailValidator:
+@pytest.fixture(scope="module")
+def validator():
+    return CommaSeparatedEmailValidator()
+
 
-    def setup_method(self):
-        self.validator = CommaSeparatedEmailValidator()
+class TestCommaSeparatedEmailValidator:
 
     @pytest.mark.parametrize("emails", [
         "test@example.com",                          # Single valid email
         "test1@example.com, test2@example.com",      # Multiple valid emails
         "test1@example.com,   test2@example.com",    # Multiple valid emails with spaces
     ])
-    def test_valid_emails(self, emails):
+    def test_valid_emails(self, validator, emails):
         # These should pass validation
-        result = self.validator(emails)
+        result = validator(emails)
         assert result is None
 
     @pytest.mark.parametrize("emails", [
@@ -26,17 +28,19 @@ class TestCommaSeparatedEmailValidator:
         "invalid-email1, invalid-email2",            # Both invalid
         "test@",                                     # Missing domain
         "@example.com",                              # Missing local part
+        "john..doe@example.com",                     # Consecutive dots
+        "test@-example.com",                         # Label starts with hyphen
     ])
-    def test_invalid_emails(self, emails):
+    def test_invalid_emails(self, validator, emails):
         with pytest.raises(ValidationError):
-            self.validator(emails)
+            validator(emails)
 
     @pytest.mark.parametrize("emails", [
         "",                                          # Empty string
         "   test@example.com   ",                    # Valid email with leading/trailing spaces
         "valid@example.com,   ",                     # Valid email with trailing comma and space
     ])
-    def test_edge_cases(self, emails):
+    def test_edge_cases(self, validator, emails):
         # These should pass validation
-        result = self.validator(emails)
+        result = validator(emails)
         assert result is None
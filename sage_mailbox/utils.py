@@ -1,23 +1,57 @@
-import re
+import string
+from email.header import decode_header
+from functools import lru_cache
+
+
+class _FilenameCharTable(dict):
+    """``str.translate`` table keeping ``[A-Za-z0-9_-]`` and replacing the rest."""
+
+    def __missing__(self, codepoint):
+        return "_"
+
+
+_SAFE_FILENAME_CHARS = frozenset(string.ascii_letters + string.digits + "_-")
+# ASCII is filled in up front; only non-ASCII characters reach ``__missing__``.
+FILENAME_CHAR_TABLE = _FilenameCharTable(
+    (codepoint, chr(codepoint) if chr(codepoint) in _SAFE_FILENAME_CHARS else "_")
+    for codepoint in range(128)
+)
+
+
+def imap_credentials():
+    """Return ``(host, username, password)`` from the settings loaded at startup."""
+    # Imported here so the models, which use this module, load without the
+    # IMAP settings being validated.
+    from sage_mailbox.conf import imap_settings
+
+    return (
+        imap_settings.IMAP_SERVER_DOMAIN,
+        imap_settings.IMAP_SERVER_USER,
+        imap_settings.IMAP_SERVER_PASSWORD,
+    )
 
 
 def sanitize_filename(filename):
     """Sanitize the filename to ensure it's safe to use in the file system."""
-    # Decode if the filename is encoded
-    if filename.startswith("=?"):
-        from email.header import decode_header
-
+    # Decode if the filename is encoded; without a closing "?=" there is no
+    # encoded word for decode_header to find
+    if filename.startswith("=?") and "?=" in filename[2:]:
         decoded_header = decode_header(filename)
         filename = "".join(
             part.decode(encoding or "utf-8") if isinstance(part, bytes) else part
             for part, encoding in decoded_header
         )
 
-    # Split the filename into name and extension
-    name, ext = re.match(r"(.+?)(\.[^.]*$|$)", filename).groups()
+    # Split the filename into name and extension; a leading dot (".bashrc")
+    # belongs to the name
+    head, dot, tail = filename.rpartition(".")
+    if head:
+        name, ext = head, dot + tail
+    else:
+        name, ext = filename, ""
 
     # Sanitize the name part
-    name = re.sub(r"[^A-Za-z0-9_\-]", "_", name)
+    name = name.translate(FILENAME_CHAR_TABLE)
 
     # Reconstruct the filename with the sanitized name and original extension
     sanitized_filename = name + ext
@@ -25,7 +59,22 @@ def sanitize_filename(filename):
     return sanitized_filename
 
 
+# Proxy models already built by ``create_proxy_model``; Django registers a
+# model class once per app and name, so building it again is both wasted work
+# and a registry conflict.
+_proxy_models = {}
+
+
 def create_proxy_model(base_model, proxy_name, new_methods=None):
+    try:
+        key = (base_model, proxy_name, tuple(sorted((new_methods or {}).items())))
+        hash(key)
+    except TypeError:
+        # Unhashable method values; build the model without caching it.
+        key = None
+    if key in _proxy_models:
+        return _proxy_models[key]
+
     class Meta:
         proxy = True
         app_label = base_model._meta.app_label
@@ -35,9 +84,13 @@ def create_proxy_model(base_model, proxy_name, new_methods=None):
     if new_methods:
         attrs.update(new_methods)
 
-    return type(proxy_name, (base_model,), attrs)
+    proxy_model = type(proxy_name, (base_model,), attrs)
+    if key is not None:
+        _proxy_models[key] = proxy_model
+    return proxy_model
 
 
+@lru_cache(maxsize=256)
 def map_to_standard_name(imap_name):
     from sage_mailbox.models.mailbox import IMAP_TO_STANDARD_MAP, StandardMailboxNames
 
@@ -62,9 +115,10 @@ def map_to_standard_name(imap_name):
     if normalized_name in IMAP_TO_STANDARD_MAP:
         return IMAP_TO_STANDARD_MAP[normalized_name]
 
-    # Check for keyword patterns in the normalized name
+    # Check for keyword patterns in the normalized name; they are plain words,
+    # so a substring test does what re.search did
     for pattern, standard_name in patterns.items():
-        if re.search(pattern, normalized_name):
+        if pattern in normalized_name:
             return standard_name
 
     # Default to the original name if no match is found
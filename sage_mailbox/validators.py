@@ -1,4 +1,5 @@
 import re
+import string
 
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
@@ -25,14 +26,19 @@ class FolderNameValidator:
     )
     code_length = "folder_name_length"
     code_character = "folder_name_invalid_character"
-    # regex to disallow leading/trailing hyphens or underscore at the end or start
-    regex = re.compile(r"^(?![-_])[a-zA-Z0-9._-]+(?<![-_])$")
+    allowed_chars = frozenset(string.ascii_letters + string.digits + "._-")
+    # hyphens and underscores are not allowed at the start or the end
+    boundary_chars = "-_"
 
     def __call__(self, value):
         if not 1 <= len(value) <= 255:
             raise ValidationError(self.length_error_message, code=self.code_length)
 
-        if not self.regex.match(value):
+        if (
+            value[0] in self.boundary_chars
+            or value[-1] in self.boundary_chars
+            or not self.allowed_chars.issuperset(value)
+        ):
             raise ValidationError(
                 self.character_error_message, code=self.code_character
             )
@@ -44,13 +50,30 @@ class FolderNameValidator:
             and self.character_error_message == other.character_error_message
             and self.code_length == other.code_length
             and self.code_character == other.code_character
-            and self.regex.pattern == other.regex.pattern
+            and self.allowed_chars == other.allowed_chars
+            and self.boundary_chars == other.boundary_chars
         )
 
+    def __hash__(self):
+        return hash((type(self).__name__, self.code_length, self.code_character))
+
 
 validate_folder_name = FolderNameValidator()
 
 
+# Plain ASCII addresses that ``validate_email`` is known to accept; anything
+# else still goes through it for the authoritative answer and error message.
+SIMPLE_EMAIL_PATTERN = re.compile(
+    r"\A[A-Za-z0-9_%+-]+(?:\.[A-Za-z0-9_%+-]+)*"
+    r"@(?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,63}\Z"
+)
+# One comma-separated item with the surrounding whitespace trimmed; empty
+# items are skipped.
+EMAIL_LIST_ITEM_PATTERN = re.compile(r"[^,\s][^,]*[^,\s]|[^,\s]")
+# ``EmailValidator`` rejects longer addresses (RFC 3696 errata 1690).
+EMAIL_MAX_LENGTH = 320
+
+
 @deconstructible
 class CommaSeparatedEmailValidator:
     message = _("'{email}' is not a valid email address.")
@@ -63,18 +86,18 @@ class CommaSeparatedEmailValidator:
             self.code = code
 
     def __call__(self, value):
-        emails = value.split(",")
-        for email in emails:
-            email = email.strip()
-            if email:
-                try:
-                    validate_email(email)
-                except ValidationError as exc:
-                    raise ValidationError(
-                        self.message.format(email=email),
-                        code=self.code,
-                        params={"email": email},
-                    ) from exc
+        for match in EMAIL_LIST_ITEM_PATTERN.finditer(value):
+            email = match.group()
+            if len(email) <= EMAIL_MAX_LENGTH and SIMPLE_EMAIL_PATTERN.match(email):
+                continue
+            try:
+                validate_email(email)
+            except ValidationError as exc:
+                raise ValidationError(
+                    self.message.format(email=email),
+                    code=self.code,
+                    params={"email": email},
+                ) from exc
 
     def __eq__(self, other):
         return (
@@ -83,5 +106,8 @@ class CommaSeparatedEmailValidator:
             and self.code == other.code
         )
 
+    def __hash__(self):
+        return hash((type(self).__name__, self.code))
+
 
 validate_comma_separated_email = CommaSeparatedEmailValidator()